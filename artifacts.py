@@ -0,0 +1,174 @@
+import logging
+import os
+import gzip
+import time
+import queue
+import base64
+import random
+import atexit
+import threading
+
+import timing
+
+# Debug screenshots (and optionally page source) land here as
+# <publish_id>_<provider>_<step>_<timestamp>.jpg / .html.gz
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+# Oldest artifacts are evicted once the directory grows past this
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(200 * 1024 * 1024)))
+ARTIFACT_JPEG_QUALITY = int(os.getenv("ARTIFACT_JPEG_QUALITY", "60"))
+ARTIFACT_PAGE_SOURCE = os.getenv("ARTIFACT_PAGE_SOURCE", "false").lower() == "true"
+# Fraction of successful steps that are captured (0 = failures only)
+ARTIFACT_SUCCESS_SAMPLE_RATE = float(os.getenv("ARTIFACT_SUCCESS_SAMPLE_RATE", "0"))
+# Captures waiting to be written; when full, new captures are dropped
+ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", "16"))
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def _grab_screenshot(driver):
+    """
+    JPEG straight from Chrome: much smaller and cheaper to encode than the
+    PNG save_screenshot produces. Returns (base64 data, extension).
+    """
+    try:
+        data = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "jpeg",
+            "quality": ARTIFACT_JPEG_QUALITY,
+        })["data"]
+        return data, ".jpg"
+    except Exception:
+        return driver.get_screenshot_as_base64(), ".png"
+
+def _safe(value):
+    return "".join(c if c.isalnum() or c in "-." else "-" for c in str(value))
+
+class ArtifactWriter:
+    """
+    Writes captured artifacts from a background thread, so disk I/O and
+    compression never run on a posting step, and keeps the directory under
+    max_bytes by deleting the oldest files.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, queue_size=None):
+        self.directory = directory or ARTIFACT_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else ARTIFACT_MAX_BYTES
+        self._queue = queue.Queue(maxsize=queue_size or ARTIFACT_QUEUE_SIZE)
+        self._files = None      # [(mtime, size, path)] oldest first, loaded lazily
+        self._total = 0
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, data, compress=False, base64_encoded=False):
+        """
+        Queues one artifact. Returns False (and drops it) if the queue is full.
+        """
+        try:
+            self._queue.put_nowait((name, data, compress, base64_encoded))
+            return True
+        except queue.Full:
+            logging.warning(f"Artifact queue full, dropped {name}.")
+            return False
+
+    def close(self, timeout=10):
+        self._queue.put((None, None, None, None))
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            name, data, compress, base64_encoded = self._queue.get()
+            if name is None:
+                return
+            try:
+                if base64_encoded:
+                    data = base64.b64decode(data)
+                self._write(name, data, compress)
+            except Exception as e:
+                logging.error(f"Failed to write artifact {name}: {e}")
+
+    def _write(self, name, data, compress):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if compress:
+            data = gzip.compress(data, compresslevel=6)
+            name += ".gz"
+
+        os.makedirs(self.directory, exist_ok=True)
+        if self._files is None:
+            self._scan()
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        self._files.append((time.time(), len(data), path))
+        self._total += len(data)
+        self._evict()
+
+    def _scan(self):
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        self._files = files
+        self._total = sum(size for _, size, _ in files)
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._files) > 1:
+            _, size, path = self._files.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total -= size
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter()
+        return _writer
+
+def capture(driver, step, success=False, page_source=None):
+    """
+    Captures a screenshot (plus page source when ARTIFACT_PAGE_SOURCE is on)
+    for the current job and step, and hands it to the background writer.
+    Successful steps are only captured at ARTIFACT_SUCCESS_SAMPLE_RATE.
+    Never raises.
+    """
+    if driver is None:
+        return
+    if success and random.random() >= ARTIFACT_SUCCESS_SAMPLE_RATE:
+        return
+    if page_source is None:
+        page_source = ARTIFACT_PAGE_SOURCE
+
+    context = timing.current_context()
+    stem = "_".join(_safe(part) for part in (
+        context.get("publish_id", "nojob"),
+        context.get("provider", "unknown"),
+        step,
+        time.strftime("%Y%m%d-%H%M%S") + f"{int(time.time() * 1000) % 1000:03d}",
+    ))
+    try:
+        # Grabbing has to happen now, while the page is in this state;
+        # decoding, compressing and writing happen on the writer thread.
+        data, ext = _grab_screenshot(driver)
+        writer = get_writer()
+        writer.submit(stem + ext, data, base64_encoded=True)
+        if page_source:
+            writer.submit(stem + ".html", driver.page_source, compress=True)
+    except Exception as e:
+        logging.warning(f"Artifact capture failed for {step}: {e}")
+
+def shutdown():
+    """
+    Drains queued artifacts before exit.
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+atexit.register(shutdown)
@@ -0,0 +1,143 @@
+"""
+Postgres fixture for the benchmark: the tables database.py reads, created in
+their own schema (BENCH_SCHEMA) so a bench run never touches real rows.
+"""
+import json
+
+from sqlalchemy import create_engine, text
+
+BENCH_SCHEMA = "blog_bench"
+
+SCHEMA_SQL = f"""
+    DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;
+    CREATE SCHEMA {BENCH_SCHEMA};
+    SET search_path TO {BENCH_SCHEMA};
+
+    CREATE TABLE platform_accounts (
+        id SERIAL PRIMARY KEY,
+        provider_id INTEGER NOT NULL,
+        parent_id INTEGER REFERENCES platform_accounts(id),
+        blog_id VARCHAR(255),
+        blog_pw VARCHAR(255),
+        blog_url VARCHAR(255),
+        category_no VARCHAR(64)
+    );
+    CREATE TABLE content_texts (
+        id SERIAL PRIMARY KEY,
+        content_title VARCHAR(255)
+    );
+    CREATE TABLE content_text_by_provider (
+        id SERIAL PRIMARY KEY,
+        content_text_id INTEGER REFERENCES content_texts(id),
+        provider_id INTEGER,
+        content TEXT
+    );
+    CREATE TABLE content_images (
+        id SERIAL PRIMARY KEY,
+        image_url TEXT,
+        "order" INTEGER DEFAULT 0
+    );
+    CREATE TABLE publish_contents_groups (
+        id SERIAL PRIMARY KEY,
+        publish_status_id INTEGER DEFAULT 1
+    );
+    CREATE TABLE publish_contents (
+        id SERIAL PRIMARY KEY,
+        group_id INTEGER REFERENCES publish_contents_groups(id),
+        platform_account_id INTEGER REFERENCES platform_accounts(id),
+        content_text_by_provider_id INTEGER REFERENCES content_text_by_provider(id),
+        content_image_ids JSONB,
+        content_video_id INTEGER,
+        publish_status_id INTEGER DEFAULT 1,
+        fail_reason TEXT,
+        reserved_at TIMESTAMPTZ DEFAULT NOW(),
+        published_at TIMESTAMPTZ,
+        updated_at TIMESTAMPTZ
+    );
+"""
+
+BODY = "\n".join(
+    f"벤치마크 본문 {i}줄. The quick brown fox jumps over the lazy dog." for i in range(1, 41)
+)
+
+def bench_database_url(database_url):
+    """
+    database_url with search_path pinned to the bench schema.
+    """
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    separator = "&" if "?" in database_url else "?"
+    return f"{database_url}{separator}options=-csearch_path%3D{BENCH_SCHEMA}"
+
+def seed(database_url, blog_urls, jobs_per_provider, accounts, images_per_job, image_base_url):
+    """
+    (Re)creates the bench schema and inserts pending publish_contents rows.
+
+    blog_urls: { provider_id: callable(account_index) -> blog_url }
+    Returns the number of jobs inserted.
+    """
+    engine = create_engine(database_url)
+    total = 0
+    with engine.begin() as conn:
+        conn.execute(text(SCHEMA_SQL))
+        conn.execute(text(f"SET search_path TO {BENCH_SCHEMA}"))
+        group_id = conn.execute(text(
+            "INSERT INTO publish_contents_groups DEFAULT VALUES RETURNING id"
+        )).scalar()
+
+        for provider_id, blog_url in blog_urls.items():
+            account_ids = [
+                conn.execute(text("""
+                    INSERT INTO platform_accounts (provider_id, blog_id, blog_pw, blog_url, category_no)
+                    VALUES (:provider_id, :blog_id, 'bench-password', :blog_url, '1')
+                    RETURNING id
+                """), {
+                    'provider_id': provider_id,
+                    'blog_id': f"bench{provider_id}x{a}",
+                    'blog_url': blog_url(f"bench{provider_id}x{a}"),
+                }).scalar()
+                for a in range(accounts)
+            ]
+
+            for n in range(jobs_per_provider):
+                text_id = conn.execute(text(
+                    "INSERT INTO content_texts (content_title) VALUES (:title) RETURNING id"
+                ), {'title': f"Bench post {provider_id}-{n}"}).scalar()
+                ctp_id = conn.execute(text("""
+                    INSERT INTO content_text_by_provider (content_text_id, provider_id, content)
+                    VALUES (:text_id, :provider_id, :content) RETURNING id
+                """), {'text_id': text_id, 'provider_id': provider_id, 'content': BODY}).scalar()
+                image_ids = [
+                    conn.execute(text(
+                        "INSERT INTO content_images (image_url, \"order\") VALUES (:url, :order) RETURNING id"
+                    ), {'url': f"{image_base_url}/img/{provider_id}-{n}-{i}.png", 'order': i}).scalar()
+                    for i in range(images_per_job)
+                ]
+                conn.execute(text("""
+                    INSERT INTO publish_contents
+                        (group_id, platform_account_id, content_text_by_provider_id, content_image_ids)
+                    VALUES (:group_id, :account_id, :ctp_id, :image_ids)
+                """), {
+                    'group_id': group_id,
+                    'account_id': account_ids[n % accounts],
+                    'ctp_id': ctp_id,
+                    'image_ids': json.dumps(image_ids),
+                })
+                total += 1
+    engine.dispose()
+    return total
+
+def status_counts(database_url):
+    """
+    { (provider_id, publish_status_id): count } after a run.
+    """
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT pa.provider_id, pc.publish_status_id, COUNT(*) as n
+            FROM {BENCH_SCHEMA}.publish_contents pc
+            JOIN {BENCH_SCHEMA}.platform_accounts pa ON pc.platform_account_id = pa.id
+            GROUP BY pa.provider_id, pc.publish_status_id
+        """)).fetchall()
+    engine.dispose()
+    return {(r.provider_id, r.publish_status_id): r.n for r in rows}
@@ -0,0 +1,356 @@
+"""
+Local stand-ins for the Naver, Tistory and Kakao pages the posters drive.
+
+Every page uses the same IDs / selectors as the real sites (see waits.py and
+the posters), so the full browser flow runs unchanged against them. Sites are
+told apart by host name; Chrome resolves *.localhost to the loopback
+address, so no DNS or /etc/hosts changes are needed:
+
+    naver.localhost    home, nidlogin.login, /<blog> write page + SmartEditor
+    tistory.localhost  home, /auth/login, blog home, /manage/newpost
+    kakao.localhost    Kakao account login form
+
+Published posts are recorded in MockState.posts.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+NAVER_HOST = "naver.localhost"
+TISTORY_HOST = "tistory.localhost"
+KAKAO_HOST = "kakao.localhost"
+
+# 1x1 transparent PNG, served for every /img/ URL
+PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+
+NAVER_HOME = """<!DOCTYPE html><html><body>
+<div id="header">{login}</div>
+</body></html>"""
+
+NAVER_LOGIN = """<!DOCTYPE html><html><body>
+<form method="post" action="/nidlogin.login">
+  <input type="text" id="id" name="id">
+  <input type="password" id="pw" name="pw">
+  <button type="submit" id="log.login">로그인</button>
+</form>
+</body></html>"""
+
+NAVER_BLOG_WRITE = """<!DOCTYPE html><html><body style="margin:0">
+<iframe id="mainFrame" name="mainFrame" src="/naver/editor?blog={blog}"
+        style="width:100%;height:900px;border:0"></iframe>
+</body></html>"""
+
+NAVER_EDITOR = """<!DOCTYPE html><html><head><style>
+  .se-documentTitle {{ min-height: 40px; border: 1px solid #ccc; }}
+  .se-text-paragraph {{ min-height: 200px; border: 1px solid #ccc; }}
+  div[class*='layer_publish'] {{ display: none; }}
+  div[class*='layer_publish'].open {{ display: block; }}
+</style></head><body>
+<button data-click-area="tpb.publish" class="publish_btn__m9KHH">발행</button>
+<div class="layer_publish__vA9mN">
+  <button data-testid="seOnePublishBtn" data-click-area="tpb*i.publish" class="confirm_btn__WEaBq">발행</button>
+</div>
+<div class="se-documentTitle" contenteditable="true"></div>
+<div class="se-main-container">
+  <p class="se-text-paragraph" contenteditable="true"></p>
+</div>
+<input type="file" multiple style="width:1px;height:1px">
+<script>
+  var paragraph = document.querySelector('.se-text-paragraph');
+  document.addEventListener('paste', function (e) {{
+    var text = e.clipboardData ? e.clipboardData.getData('text/plain') : '';
+    if (text) {{
+      paragraph.innerText += text;
+      e.preventDefault();
+    }}
+  }});
+  document.querySelector("input[type='file']").addEventListener('change', function (e) {{
+    for (var i = 0; i < e.target.files.length; i++) {{
+      var img = document.createElement('div');
+      img.className = 'se-image-resource';
+      document.querySelector('.se-main-container').appendChild(img);
+    }}
+  }});
+  document.querySelector("button[data-click-area='tpb.publish']").addEventListener('click', function () {{
+    document.querySelector("div[class*='layer_publish']").classList.add('open');
+  }});
+  document.querySelector("button[data-testid='seOnePublishBtn']").addEventListener('click', function () {{
+    fetch('/naver/api/publish', {{
+      method: 'POST',
+      headers: {{ 'Content-Type': 'application/json' }},
+      body: JSON.stringify({{
+        blog: {blog_json},
+        title: document.querySelector('.se-documentTitle').innerText,
+        content: document.querySelector('.se-main-container').innerText,
+        images: document.querySelectorAll('.se-image-resource').length
+      }})
+    }}).then(function (r) {{ return r.json(); }}).then(function (data) {{
+      window.top.location.href = data.url;
+    }});
+  }});
+</script>
+</body></html>"""
+
+TISTORY_HOME = """<!DOCTYPE html><html><body>
+<div id="header">{login}</div>
+</body></html>"""
+
+TISTORY_LOGIN = """<!DOCTYPE html><html><body>
+<a class="btn_login link_kakao_id" href="http://{kakao_host}/login">카카오계정으로 로그인</a>
+</body></html>"""
+
+KAKAO_LOGIN = """<!DOCTYPE html><html><body>
+<form method="post" action="/login">
+  <input type="text" id="loginId--1" name="loginId">
+  <input type="password" id="password--2" name="password">
+  <button type="submit" class="btn_g highlight submit">로그인</button>
+</form>
+</body></html>"""
+
+TISTORY_BLOG_HOME = """<!DOCTYPE html><html><body>
+<button type="button" class="btn-g btn-primary btn-write"
+        onclick="location.href='{blog_path}/manage/newpost'">글쓰기</button>
+</body></html>"""
+
+TISTORY_EDITOR = """<!DOCTYPE html><html><head><style>
+  .hidden {{ display: none; }}
+  .CodeMirror {{ min-height: 200px; border: 1px solid #ccc; }}
+</style></head><body>
+<button id="editor-mode-layer-btn-open">기본모드</button>
+<div id="editor-mode-layer" class="hidden"><div id="editor-mode-html">HTML</div></div>
+<button id="category-btn">카테고리</button>
+<div id="category-list" class="hidden">
+  <div category-id="0">카테고리 없음</div>
+  <div category-id="{category}">벤치마크</div>
+</div>
+<input type="text" id="post-title-inp">
+<div class="CodeMirror"><textarea class="ace_text-input"></textarea></div>
+<button id="publish-layer-btn">완료</button>
+<form id="publish-layer" class="hidden" method="post" action="{blog_path}/manage/post">
+  <span>공개</span>
+  <input type="hidden" name="post_title"><input type="hidden" name="post_content">
+  <input type="hidden" name="post_category">
+  <button type="submit" id="publish-btn">발행</button>
+</form>
+<script>
+  var value = '';
+  var input = document.querySelector('textarea.ace_text-input');
+  input.addEventListener('input', function () {{ value = input.value; }});
+  document.querySelector('.CodeMirror').CodeMirror = {{
+    setValue: function (v) {{ value = v; }},
+    getValue: function () {{ return value; }}
+  }};
+  var category = '0';
+  function show(id) {{ document.getElementById(id).classList.remove('hidden'); }}
+  document.getElementById('editor-mode-layer-btn-open').onclick = function () {{ show('editor-mode-layer'); }};
+  document.getElementById('editor-mode-html').onclick = function () {{
+    confirm('HTML 모드로 전환하시겠습니까?');
+  }};
+  document.getElementById('category-btn').onclick = function () {{ show('category-list'); }};
+  document.querySelectorAll('#category-list div').forEach(function (el) {{
+    el.onclick = function () {{ category = el.getAttribute('category-id'); }};
+  }});
+  document.getElementById('publish-layer-btn').onclick = function () {{ show('publish-layer'); }};
+  document.getElementById('publish-layer').onsubmit = function () {{
+    this.elements.post_title.value = document.getElementById('post-title-inp').value;
+    this.elements.post_content.value = value;
+    this.elements.post_category.value = category;
+  }};
+</script>
+</body></html>"""
+
+class MockState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.posts = []
+
+    def record(self, provider, blog, title, content, via):
+        with self.lock:
+            self.posts.append({
+                "provider": provider,
+                "blog": blog,
+                "title": title,
+                "content_length": len(content or ""),
+                "via": via,
+            })
+            return len(self.posts)
+
+def _cookies(header):
+    cookies = {}
+    for part in (header or "").split(";"):
+        if "=" in part:
+            name, value = part.strip().split("=", 1)
+            cookies[name] = value
+    return cookies
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None    # set by start_mock_server
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- helpers ---
+
+    def _host(self):
+        return (self.headers.get("Host") or "").split(":")[0]
+
+    def _origin(self, host):
+        return f"http://{host}:{self.server.server_port}"
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location, cookie=None):
+        headers = {"Location": location}
+        if cookie:
+            headers["Set-Cookie"] = f"{cookie}; Path=/"
+        self._send(302, headers=headers)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8") if length else ""
+
+    def _form(self):
+        return {k: v[0] for k, v in parse_qs(self._body(), keep_blank_values=True).items()}
+
+    def _logged_in(self, cookie_name):
+        return cookie_name in _cookies(self.headers.get("Cookie"))
+
+    # --- routing ---
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        host = self._host()
+        path = url.path.rstrip("/") or "/"
+
+        if path.startswith("/img/"):
+            return self._send(200, PIXEL_PNG, "image/png")
+
+        if host == NAVER_HOST:
+            if path == "/":
+                login = ('<button class="btn_logout">로그아웃</button>' if self._logged_in("NID_AUT")
+                         else '<a class="link_login" href="/nidlogin.login">로그인</a>')
+                return self._send(200, NAVER_HOME.format(login=login))
+            if path == "/nidlogin.login":
+                return self._send(200, NAVER_LOGIN)
+            if path == "/naver/editor":
+                blog = parse_qs(url.query).get("blog", [""])[0]
+                return self._send(200, NAVER_EDITOR.format(blog=blog, blog_json=json.dumps(blog)))
+            # Anything else is a blog: /<blog>?Redirect=Write or /<blog>/postview/<n>
+            blog = path.split("/")[1]
+            if "/postview/" in path:
+                return self._send(200, f"<html><body>{blog} post</body></html>")
+            return self._send(200, NAVER_BLOG_WRITE.format(blog=blog))
+
+        if host == TISTORY_HOST:
+            if path == "/":
+                login = ('<a class="link_mypage" href="/manage">내 블로그</a>' if self._logged_in("TSSESSION")
+                         else '<a class="link_login" href="/auth/login">로그인</a>')
+                return self._send(200, TISTORY_HOME.format(login=login))
+            if path == "/auth/login":
+                return self._send(200, TISTORY_LOGIN.format(kakao_host=f"{KAKAO_HOST}:{self.server.server_port}"))
+            if path == "/auth/kakao/callback":
+                return self._redirect("/", cookie="TSSESSION=bench")
+            if path.startswith("/blog/"):
+                parts = path.split("/")
+                blog_path = "/".join(parts[:3])
+                if path.endswith("/manage/newpost"):
+                    return self._send(200, TISTORY_EDITOR.format(blog_path=blog_path, category=1))
+                if "/entry/" in path:
+                    return self._send(200, f"<html><body>{parts[2]} entry</body></html>")
+                return self._send(200, TISTORY_BLOG_HOME.format(blog_path=blog_path))
+
+        if host == KAKAO_HOST and path == "/login":
+            return self._send(200, KAKAO_LOGIN)
+
+        self._send(404, "not found", "text/plain")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        host = self._host()
+        path = url.path.rstrip("/")
+
+        if host == NAVER_HOST:
+            if path == "/nidlogin.login":
+                self._form()
+                return self._redirect(self._origin(NAVER_HOST) + "/", cookie="NID_AUT=bench")
+            if path == "/naver/api/publish":
+                data = json.loads(self._body() or "{}")
+                n = self.state.record("naver", data.get("blog"), data.get("title"), data.get("content"), "browser")
+                post_url = f"/{data.get('blog')}/postview/{n}"
+                return self._send(200, json.dumps({"url": post_url}), "application/json")
+            if path == "/RabbitWrite.naver":
+                if not self._logged_in("NID_AUT"):
+                    return self._send(401, "", "text/plain")
+                form = self._form()
+                document = json.loads(form.get("documentModel") or "{}")
+                components = document.get("document", {}).get("components", [])
+                title = "".join(
+                    node.get("value", "")
+                    for p in (components[0].get("title", []) if components else [])
+                    for node in p.get("nodes", [])
+                )
+                n = self.state.record("naver", form.get("blogId"), title, form.get("documentModel"), "http")
+                return self._send(200, json.dumps({
+                    "isSuccess": True,
+                    "result": {"redirectUrl": f"/{form.get('blogId')}/postview/{n}"},
+                }), "application/json")
+
+        if host == KAKAO_HOST and path == "/login":
+            self._form()
+            return self._redirect(self._origin(TISTORY_HOST) + "/auth/kakao/callback")
+
+        if host == TISTORY_HOST and path.startswith("/blog/"):
+            parts = path.split("/")
+            blog_path = "/".join(parts[:3])
+            if path.endswith("/manage/post"):
+                form = self._form()
+                n = self.state.record("tistory", parts[2], form.get("post_title"), form.get("post_content"), "browser")
+                return self._redirect(f"{blog_path}/entry/{n}")
+            if path.endswith("/manage/post.json"):
+                if not self._logged_in("TSSESSION"):
+                    return self._send(401, "", "text/plain")
+                data = json.loads(self._body() or "{}")
+                n = self.state.record("tistory", parts[2], data.get("title"), data.get("content"), "http")
+                entry_url = self._origin(TISTORY_HOST) + f"{blog_path}/entry/{n}"
+                return self._send(200, json.dumps({"entryUrl": entry_url}), "application/json")
+
+        self._send(404, "not found", "text/plain")
+
+def start_mock_server(port=0):
+    """
+    Starts the mock sites on 127.0.0.1 in a daemon thread.
+    Returns (server, state); server.server_port is the bound port.
+    """
+    state = MockState()
+    handler = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-sites", daemon=True).start()
+    return server, state
+
+def site_env(port):
+    """
+    Environment overrides pointing the posters at the mock sites.
+    """
+    return {
+        "NAVER_HOME_URL": f"http://{NAVER_HOST}:{port}",
+        "NAVER_LOGIN_URL": f"http://{NAVER_HOST}:{port}/nidlogin.login",
+        "NAVER_BLOG_URL": f"http://{NAVER_HOST}:{port}",
+        "NAVER_HTTP_WRITE_URL": f"http://{NAVER_HOST}:{port}/RabbitWrite.naver",
+        "TISTORY_HOME_URL": f"http://{TISTORY_HOST}:{port}",
+        "TISTORY_HOST": TISTORY_HOST,
+        "KAKAO_ACCOUNTS_HOST": KAKAO_HOST,
+    }
@@ -0,0 +1,264 @@
+"""
+Offline throughput benchmark: runs the real posting pipeline (claim -> image
+prefetch -> Chrome -> post -> status) against the local mock sites and a
+seeded Postgres schema, then reports jobs/minute, p50/p95 per phase (from the
+timing spans) and Chrome memory.
+
+    BENCH_DATABASE_URL=postgresql://localhost/scratch python bench/run_bench.py --jobs 20
+
+Tables are created in their own schema (blog_bench), which is dropped and
+recreated on every run. Use --output to keep a JSON report for comparing
+commits.
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from mock_server import start_mock_server, site_env, NAVER_HOST, TISTORY_HOST
+import fixtures
+
+PROVIDER_NAVER = 19
+PROVIDER_TISTORY = 8
+
+def percentile(values, pct):
+    if not values:
+        return None
+    # Nearest-rank
+    values = sorted(values)
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+class ChromeMemorySampler:
+    """
+    Samples the summed RSS of every Chrome / chromedriver process descended
+    from this one, via /proc (Linux only).
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self):
+        if os.path.isdir("/proc"):
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append(self.chrome_rss())
+
+    @staticmethod
+    def _read_status(pid):
+        fields = {}
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    fields[key] = value.strip()
+        except OSError:
+            pass
+        return fields
+
+    def chrome_rss(self):
+        me = os.getpid()
+        parents = {}
+        info = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                status = self._read_status(name)
+                if status:
+                    pid = int(name)
+                    parents[pid] = int(status.get("PPid", 0))
+                    info[pid] = status
+
+        total = 0
+        for pid, status in info.items():
+            if "chrom" not in status.get("Name", "").lower():
+                continue
+            ancestor = parents.get(pid)
+            while ancestor and ancestor != me:
+                ancestor = parents.get(ancestor)
+            if ancestor == me:
+                total += int(status.get("VmRSS", "0 kB").split()[0]) * 1024
+        return total
+
+    def summary(self):
+        if not self.samples:
+            return {"peak_mb": None, "mean_mb": None}
+        mb = [s / (1024 * 1024) for s in self.samples]
+        return {"peak_mb": round(max(mb), 1), "mean_mb": round(sum(mb) / len(mb), 1)}
+
+def span_stats(span_log):
+    durations = {}
+    try:
+        with open(span_log, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                durations.setdefault(record["span"], []).append(record["duration_ms"])
+    except FileNotFoundError:
+        pass
+    return {
+        name: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+        }
+        for name, values in sorted(durations.items())
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the posting pipeline against local mock sites.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Scratch Postgres database (default: BENCH_DATABASE_URL)")
+    parser.add_argument("--providers", default="naver,tistory", help="Comma separated: naver,tistory")
+    parser.add_argument("--jobs", type=int, default=10, help="Jobs per provider")
+    parser.add_argument("--accounts", type=int, default=2, help="Accounts per provider")
+    parser.add_argument("--images", type=int, default=0, help="Images per job")
+    parser.add_argument("--workers", type=int, default=1, help="WORKER_COUNT")
+    parser.add_argument("--no-batch", action="store_true", help="BATCH_MODE=false (one login per post)")
+    parser.add_argument("--http", action="store_true", help="NAVER_HTTP_MODE / TISTORY_HTTP_MODE=true")
+    parser.add_argument("--headful", action="store_true", help="Show the browser")
+    parser.add_argument("--output", help="Write the report as JSON here")
+    parser.add_argument("--keep-workdir", action="store_true")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not args.database_url:
+        sys.exit("Set BENCH_DATABASE_URL (or --database-url) to a scratch Postgres database.")
+    providers = [p.strip() for p in args.providers.split(",") if p.strip()]
+    output = os.path.abspath(args.output) if args.output else None
+    if args.http:
+        try:
+            socket.getaddrinfo(NAVER_HOST, 80)
+        except socket.gaierror:
+            # Chrome resolves *.localhost itself; requests goes through the system resolver
+            print(f"Warning: {NAVER_HOST} / {TISTORY_HOST} do not resolve outside Chrome; "
+                  "add them to /etc/hosts or HTTP posts will fail.")
+
+    server, state = start_mock_server()
+    port = server.server_port
+    database_url = fixtures.bench_database_url(args.database_url)
+
+    blog_urls = {}
+    if "naver" in providers:
+        blog_urls[PROVIDER_NAVER] = lambda blog: f"http://{NAVER_HOST}:{port}/{blog}"
+    if "tistory" in providers:
+        blog_urls[PROVIDER_TISTORY] = lambda blog: f"http://{TISTORY_HOST}:{port}/blog/{blog}"
+    seeded = fixtures.seed(
+        args.database_url, blog_urls, args.jobs, args.accounts, args.images, f"http://127.0.0.1:{port}"
+    )
+    print(f"Seeded {seeded} jobs; mock sites on port {port}.")
+
+    # Everything the pipeline writes (logs, spans, sessions, screenshots) goes here.
+    workdir = tempfile.mkdtemp(prefix="blog-bench-")
+    span_log = os.path.join(workdir, "spans.jsonl")
+    os.environ.update(site_env(port))
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "SESSION_STORE_DIR": os.path.join(workdir, "sessions"),
+        "IMAGE_CACHE_DIR": os.path.join(workdir, "image_cache"),
+        "SPAN_LOG_FILE": span_log,
+        "SPANS_ENABLED": "true",
+        "HEADLESS": "false" if args.headful else "true",
+        "WORKER_COUNT": str(args.workers),
+        "BATCH_MODE": "false" if args.no_batch else "true",
+        "NAVER_HTTP_MODE": "true" if args.http else "false",
+        "TISTORY_HTTP_MODE": "true" if args.http else "false",
+        "CLAIM_BATCH_SIZE": str(max(args.jobs, 1)),
+    })
+    os.chdir(workdir)
+
+    import main as worker
+    import browser
+    import database
+    import timing
+
+    worker.status_writer = database.StatusWriter()
+    worker.lease_renewer = database.LeaseRenewer()
+    runners = {
+        "naver": worker.run_naver_automation,
+        "tistory": worker.run_tistory_automation,
+    }
+
+    sampler = ChromeMemorySampler().start()
+    started = time.monotonic()
+    try:
+        for provider in providers:
+            runners[provider]()
+    finally:
+        elapsed = time.monotonic() - started
+        worker.lease_renewer.close()
+        worker.status_writer.close()
+        browser.shutdown_pool()
+        sampler.stop()
+        server.shutdown()
+        timing.flush_spans()
+
+    counts = fixtures.status_counts(args.database_url)
+    published = sum(n for (_, status), n in counts.items() if status == 3)
+    failed = sum(n for (_, status), n in counts.items() if status == 2)
+
+    report = {
+        "revision": git_revision(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("database_url", "output")},
+        "elapsed_s": round(elapsed, 1),
+        "jobs": seeded,
+        "published": published,
+        "failed": failed,
+        "posts_received": len(state.posts),
+        "jobs_per_minute": round(published / elapsed * 60, 2) if elapsed else None,
+        "chrome_rss": sampler.summary(),
+        "phases": span_stats(span_log),
+    }
+
+    print()
+    print(f"Revision:     {report['revision']}")
+    print(f"Elapsed:      {report['elapsed_s']}s")
+    print(f"Jobs:         {published} published / {failed} failed / {seeded} seeded "
+          f"({report['posts_received']} posts received by mock)")
+    print(f"Throughput:   {report['jobs_per_minute']} jobs/min")
+    print(f"Chrome RSS:   peak {report['chrome_rss']['peak_mb']} MB, mean {report['chrome_rss']['mean_mb']} MB")
+    print()
+    print(f"{'phase':40} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, stats in report["phases"].items():
+        print(f"{name:40} {stats['count']:>6} {stats['p50_ms']:>10} {stats['p95_ms']:>10}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.keep_workdir:
+        print(f"\nWork dir kept: {workdir}")
+    else:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
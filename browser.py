@@ -1,3 +1,4 @@
+import logging
 import os
 import time
 import random
@@ -5,10 +6,54 @@ import undetected_chromedriver as uc
 from selenium.webdriver.chrome.options import Options
 import subprocess
 import re
+import shutil
+import atexit
+import tempfile
+import threading
 
-def get_installed_chrome_version():
+import timing
+
+CHROME_BINARY_CANDIDATES = (
+    "/usr/bin/google-chrome",
+    "/usr/bin/google-chrome-stable",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
+    os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
+    os.path.expandvars(r"%LocalAppData%\Google\Chrome\Application\chrome.exe"),
+)
+
+# Patched chromedriver binaries, one per Chrome build
+CHROMEDRIVER_CACHE_DIR = os.getenv(
+    "CHROMEDRIVER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "blog-auto-upload", "chromedriver"),
+)
+
+_version_cache = {}
+_version_lock = threading.Lock()
+_driver_binary_lock = threading.Lock()
+
+def get_chrome_binary_path():
+    binary = os.getenv("CHROME_BINARY_LOCATION")
+    if binary and os.path.exists(binary):
+        return binary
+    for candidate in CHROME_BINARY_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def _chrome_fingerprint():
     """
-    Attempts to detect the major version of the installed Google Chrome.
+    Identifies the installed Chrome binary; changes when Chrome is updated.
+    """
+    binary = get_chrome_binary_path()
+    if not binary:
+        return None
+    stat = os.stat(binary)
+    return (binary, stat.st_mtime, stat.st_size)
+
+def _detect_chrome_build():
+    """
+    Shells out to find the full installed Chrome build, e.g. '120.0.6099.109'.
     """
     try:
         if os.name == 'nt':
@@ -34,19 +79,156 @@ def get_installed_chrome_version():
             output = subprocess.check_output(cmd, shell=True).decode('utf-8')
             
         # Parse version
-        version_match = re.search(r'(\d+)\.\d+\.\d+\.\d+', output)
+        version_match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
         if not version_match:
              version_match = re.search(r' (\d+)\.', output)
 
         if version_match:
-            return int(version_match.group(1))
+            return version_match.group(1)
     except Exception as e:
-        print(f"Warning: Could not detect Chrome version: {e}")
+        logging.warning(f"Warning: Could not detect Chrome version: {e}")
+    return None
+
+def get_chrome_build():
+    """
+    Returns the full Chrome build string, detected once per process and
+    re-detected only if the Chrome binary changes on disk.
+    """
+    try:
+        fingerprint = _chrome_fingerprint()
+    except OSError:
+        fingerprint = None
+    with _version_lock:
+        if "build" in _version_cache and _version_cache.get("fingerprint") == fingerprint:
+            return _version_cache["build"]
+        build = _detect_chrome_build()
+        _version_cache.update(fingerprint=fingerprint, build=build)
+        return build
+
+def get_installed_chrome_version():
+    """
+    Attempts to detect the major version of the installed Google Chrome.
+    """
+    build = get_chrome_build()
+    if build:
+        return int(build.split('.')[0])
     return None
 
-def get_driver(headless=False):
+def get_patched_driver_path(build):
+    """
+    Returns a chromedriver already patched by undetected_chromedriver for
+    this Chrome build, downloading and patching it only on a cache miss.
+    Binaries for other builds are removed, so the cache only turns over
+    when Chrome itself is updated.
+    """
+    if not build:
+        return None
+    suffix = ".exe" if os.name == 'nt' else ""
+    cached = os.path.join(CHROMEDRIVER_CACHE_DIR, f"chromedriver-{build}{suffix}")
+
+    with _driver_binary_lock:
+        if os.path.exists(cached):
+            return cached
+        try:
+            logging.info(f"Patching chromedriver for Chrome {build} (first run for this build)...")
+            patcher = uc.Patcher(version_main=int(build.split('.')[0]))
+            patcher.auto()
+
+            os.makedirs(CHROMEDRIVER_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cached}.tmp"
+            shutil.copyfile(patcher.executable_path, tmp_path)
+            os.chmod(tmp_path, 0o755)
+            os.replace(tmp_path, cached)
+
+            for name in os.listdir(CHROMEDRIVER_CACHE_DIR):
+                path = os.path.join(CHROMEDRIVER_CACHE_DIR, name)
+                if name.startswith("chromedriver-") and path != cached:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            return cached
+        except Exception as e:
+            logging.warning(f"Warning: Could not cache patched chromedriver: {e}")
+            return None
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+# Resource blocking: requests the posters never look at (ads, trackers,
+# fonts, media) are dropped via CDP Network.setBlockedURLs.
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() == "true"
+
+BLOCKED_URL_PATTERNS = _env_list("BLOCKED_URL_PATTERNS", (
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googleadservices.com*",
+    "*facebook.net*",
+    "*criteo.*",
+    "*siape.veta.naver.com*",   # Naver display ads
+    "*lcs.naver.com*",          # Naver click logging
+    "*tivan.naver.com*",        # Naver ad/tracking beacons
+    "*t1.daumcdn.net/kas/*",    # Kakao AdFit
+    "*display.ad.daum.net*",
+    "*analytics.ad.daum.net*",
+))
+
+RESOURCE_TYPE_PATTERNS = {
+    "image": ("*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*", "*.gif", "*.gif?*", "*.webp", "*.webp?*"),
+    "font": ("*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.otf?*"),
+    "media": ("*.mp4", "*.mp4?*", "*.webm", "*.webm?*", "*.m3u8*"),
+}
+BLOCKED_RESOURCE_TYPES = _env_list("BLOCKED_RESOURCE_TYPES", ("font", "media"))
+
+# Per provider: resource types and URL patterns that must stay loadable for
+# the login and editor pages to work (e.g. Naver's captcha is an image).
+PROVIDER_ALLOWLISTS = {
+    "naver": {
+        "types": _env_list("NAVER_ALLOWED_RESOURCE_TYPES", ("image",)),
+        "patterns": _env_list("NAVER_ALLOWED_URL_PATTERNS", ()),
+    },
+    "tistory": {
+        "types": _env_list("TISTORY_ALLOWED_RESOURCE_TYPES", ()),
+        "patterns": _env_list("TISTORY_ALLOWED_URL_PATTERNS", ()),
+    },
+}
+
+def get_blocked_url_patterns(provider=None):
+    """
+    Effective block list for a provider: the ad/tracker patterns plus the
+    blocked resource types, minus whatever the provider's allowlist keeps.
+    """
+    allow = PROVIDER_ALLOWLISTS.get(provider, {"types": [], "patterns": []})
+    patterns = [p for p in BLOCKED_URL_PATTERNS if p not in allow["patterns"]]
+    for resource_type in BLOCKED_RESOURCE_TYPES:
+        if resource_type not in allow["types"]:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, ()))
+    return patterns
+
+def apply_resource_blocking(driver, provider=None):
+    """
+    (Re)applies the block list for provider on a live driver. Cheap enough
+    to call on every pool checkout.
+    """
+    patterns = get_blocked_url_patterns(provider) if BLOCK_RESOURCES else []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logging.warning(f"Warning: Could not apply resource blocking: {e}")
+
+def get_driver(headless=False, provider=None, block_resources=None, user_data_dir=None):
     """
     Initializes and returns an undetected_chromedriver instance.
+    block_resources (default: BLOCK_RESOURCES env) drops ads, trackers and
+    heavy resources using provider's allowlist.
+    user_data_dir: profile directory to run on (see prepare_profile);
+    by default Chrome starts from an empty temporary profile.
     """
     options = Options()
     
@@ -74,17 +256,442 @@ def get_driver(headless=False):
     # Language
     options.add_argument("--lang=ko_KR")
 
-    # Version Detection
+    # Version Detection (cached per process / Chrome binary)
     installed_version = get_installed_chrome_version()
     if installed_version:
-        print(f"Detected Chrome version: {installed_version}")
+        logging.info(f"Detected Chrome version: {installed_version}")
+    driver_path = get_patched_driver_path(get_chrome_build())
     
     try:
-        # Detected version and use_subprocess=True for maximum compatibility/stealth
-        driver = uc.Chrome(options=options, use_subprocess=True, version_main=installed_version)
+        # Detected version and use_subprocess=True for maximum compatibility/stealth.
+        # A pre-patched driver_executable_path skips uc's download + patch step.
+        driver = uc.Chrome(
+            options=options,
+            use_subprocess=True,
+            version_main=installed_version,
+            driver_executable_path=driver_path,
+            user_data_dir=user_data_dir,
+        )
             
         driver.set_window_size(1920, 1080)
+
+        if block_resources is None:
+            block_resources = BLOCK_RESOURCES
+        if block_resources:
+            apply_resource_blocking(driver, provider)
         return driver
     except Exception as e:
-        print(f"Failed to initialize driver: {e}")
+        logging.error(f"Failed to initialize driver: {e}")
         raise e
+
+
+# Profile templates: a user-data-dir per provider that has already been through
+# Chrome's first run (component setup, caches, Code Cache for the provider's
+# home page). Each driver gets its own copy on tmpfs, removed when it quits.
+# Login state never lives in a template; session_store restores it per account.
+PROFILE_TEMPLATES = os.getenv("PROFILE_TEMPLATES", "true").lower() == "true"
+PROFILE_TEMPLATE_DIR = os.getenv(
+    "PROFILE_TEMPLATE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "blog-auto-upload", "profiles"),
+)
+# Working copies go here; /dev/shm when available and roomy enough
+PROFILE_WORK_DIR = os.getenv("PROFILE_WORK_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+# Files never copied out of a template (lock files of the Chrome that built it, crash dumps)
+PROFILE_COPY_EXCLUDE = _env_list("PROFILE_COPY_EXCLUDE", (
+    "Singleton*", "*.lock", "lockfile", "Crash Reports", "Crashpad", "BrowserMetrics*",
+))
+# Page visited while building a template, so its caches hold that site's assets
+PROFILE_WARM_URLS = {
+    "naver": os.getenv("NAVER_HOME_URL", "https://www.naver.com"),
+    "tistory": os.getenv("TISTORY_HOME_URL", "https://www.tistory.com"),
+}
+
+PROFILE_PREFIX = "blog-chrome-"
+
+_template_lock = threading.Lock()
+_template_sizes = {}        # template path -> bytes, for the free space check
+_template_failed = set()    # providers whose template could not be built
+_profile_sweep_done = False
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _template_path(provider):
+    return os.path.join(PROFILE_TEMPLATE_DIR, provider or "default")
+
+def _template_is_current(path):
+    """
+    A template is reused until Chrome is updated; profiles written by a
+    newer or older build trigger migrations on every launch.
+    """
+    try:
+        with open(os.path.join(path, ".chrome-build")) as f:
+            return f.read().strip() == (get_chrome_build() or "")
+    except OSError:
+        return False
+
+def build_profile_template(provider=None, headless=True):
+    """
+    Launches Chrome once on an empty profile, lets it finish its first run on
+    the provider's home page, and keeps the resulting user-data-dir as the
+    provider's template. Returns the template path, or None on failure.
+    """
+    path = _template_path(provider)
+    staging = f"{path}.building-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    driver = None
+    try:
+        logging.info(f"Building Chrome profile template for {provider or 'default'}...")
+        with timing.span("chrome.profile_template", provider=provider or ""):
+            driver = get_driver(headless=headless, provider=provider, user_data_dir=staging)
+            url = PROFILE_WARM_URLS.get(provider)
+            if url:
+                driver.get(url)
+                time.sleep(2)
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            # Quitting flushes the profile to disk
+            driver.quit()
+            driver = None
+        with open(os.path.join(staging, ".chrome-build"), "w") as f:
+            f.write(get_chrome_build() or "")
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging, path)
+        logging.info(f"Chrome profile template for {provider or 'default'} ready ({_dir_size(path) // 1024} KB).")
+        return path
+    except Exception as e:
+        logging.warning(f"Warning: Could not build Chrome profile template: {e}")
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        shutil.rmtree(staging, ignore_errors=True)
+        return None
+
+def get_profile_template(provider=None, headless=True):
+    """
+    Returns the provider's template directory, building it on first use.
+    """
+    path = _template_path(provider)
+    with _template_lock:
+        if not _template_is_current(path):
+            if provider in _template_failed:
+                return None
+            if build_profile_template(provider, headless=headless) is None:
+                # Don't pay for a failing Chrome launch on every checkout
+                _template_failed.add(provider)
+                return None
+            _template_sizes.pop(path, None)
+        if path not in _template_sizes:
+            _template_sizes[path] = _dir_size(path)
+        return path
+
+def _sweep_stale_profiles():
+    """
+    Removes working copies left behind by worker processes that died without
+    cleaning up (tmpfs outlives the process in a container).
+    """
+    global _profile_sweep_done
+    if _profile_sweep_done:
+        return
+    _profile_sweep_done = True
+    try:
+        names = os.listdir(PROFILE_WORK_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(PROFILE_PREFIX):
+            continue
+        try:
+            pid = int(name[len(PROFILE_PREFIX):].split("-")[0])
+            os.kill(pid, 0)
+            continue
+        except ProcessLookupError:
+            pass
+        except (ValueError, PermissionError, OSError):
+            continue
+        shutil.rmtree(os.path.join(PROFILE_WORK_DIR, name), ignore_errors=True)
+
+def prepare_profile(provider=None, headless=True):
+    """
+    Copies the provider's template into a fresh working directory under
+    PROFILE_WORK_DIR and returns its path, or None (Chrome then starts on an
+    empty profile) when templates are off or unavailable.
+    """
+    if not PROFILE_TEMPLATES:
+        return None
+    template = get_profile_template(provider, headless=headless)
+    if not template:
+        return None
+
+    with _template_lock:
+        _sweep_stale_profiles()
+    work_dir = PROFILE_WORK_DIR
+    try:
+        # Leave headroom on tmpfs (Chrome writes caches as it runs)
+        if shutil.disk_usage(work_dir).free < _template_sizes.get(template, 0) * 3:
+            logging.warning(f"Not enough space in {work_dir} for a Chrome profile, using {tempfile.gettempdir()}.")
+            work_dir = tempfile.gettempdir()
+        path = tempfile.mkdtemp(prefix=f"{PROFILE_PREFIX}{os.getpid()}-", dir=work_dir)
+        with timing.span("chrome.profile_copy", provider=provider or ""):
+            shutil.copytree(template, path, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns(*PROFILE_COPY_EXCLUDE))
+        return path
+    except Exception as e:
+        logging.warning(f"Warning: Could not copy Chrome profile template: {e}")
+        return None
+
+def remove_profile(path):
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+
+# Origins whose storage is wiped when a driver goes back into the pool.
+RESET_ORIGINS = (
+    "https://www.naver.com",
+    "https://nid.naver.com",
+    "https://blog.naver.com",
+    "https://www.tistory.com",
+    "https://accounts.kakao.com",
+)
+
+def is_driver_alive(driver):
+    """
+    Cheap health check: a crashed or closed Chrome raises on any command.
+    """
+    try:
+        return bool(driver.window_handles) and driver.current_url is not None
+    except Exception:
+        return False
+
+def reset_driver(driver):
+    """
+    Returns a driver to a neutral state so the next job starts clean:
+    closes extra tabs, drops cookies, cache and storage, and parks on about:blank.
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.switch_to.default_content()
+
+    try:
+        alert = driver.switch_to.alert
+        alert.dismiss()
+    except Exception:
+        pass
+
+    driver.get("about:blank")
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    for origin in RESET_ORIGINS:
+        try:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "all",
+            })
+        except Exception:
+            pass
+
+class DriverPool:
+    """
+    Keeps warm Chrome instances around so consecutive jobs skip the
+    launch + undetected-chromedriver patch step.
+
+    Limits (env overridable):
+    - DRIVER_POOL_SIZE: max drivers alive at once (idle + checked out)
+    - DRIVER_POOL_MAX_IDLE: seconds an idle driver may sit before it is quit
+    - DRIVER_POOL_MAX_USES: jobs served before a driver is recycled
+    """
+
+    def __init__(self, max_size=None, max_idle=None, max_uses=None, headless=False):
+        self.max_size = max_size or int(os.getenv("DRIVER_POOL_SIZE", "2"))
+        self.max_idle = max_idle or float(os.getenv("DRIVER_POOL_MAX_IDLE", "300"))
+        self.max_uses = max_uses or int(os.getenv("DRIVER_POOL_MAX_USES", "20"))
+        self.headless = headless
+
+        self._cond = threading.Condition()
+        self._idle = []      # [(driver, last_used_ts)], most recently used last
+        self._uses = {}      # id(driver) -> jobs served
+        self._profiles = {}  # id(driver) -> working profile dir to remove on quit
+        self._total = 0      # idle + checked out
+        self._closed = False
+
+    def checkout(self, timeout=None, provider=None):
+        """
+        Returns a healthy driver, reusing an idle one when possible.
+        Blocks while the pool is at max_size and every driver is busy.
+        The provider's resource blocking rules are applied to the driver.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            driver = None
+            retired = []
+            try:
+                with self._cond:
+                    while True:
+                        if self._closed:
+                            raise RuntimeError("Driver pool is closed")
+                        retired += self._reap_idle_locked()
+
+                        if self._idle:
+                            driver, _ = self._idle.pop()
+                            break
+
+                        if self._total < self.max_size:
+                            self._total += 1
+                            break
+
+                        remaining = deadline - time.monotonic() if deadline else None
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError("Timed out waiting for a pooled driver")
+                        self._cond.wait(remaining)
+            finally:
+                self._quit(retired)
+
+            if driver is None:
+                break
+
+            # Health check outside the lock: on a hung Chrome every command
+            # can block until the HTTP timeout.
+            if is_driver_alive(driver):
+                # Pooled drivers may have served another provider last time
+                if BLOCK_RESOURCES:
+                    apply_resource_blocking(driver, provider)
+                return driver
+
+            logging.warning("Pooled driver failed health check, discarding.")
+            with self._cond:
+                retired = [self._retire_locked(driver)]
+                self._cond.notify()
+            self._quit(retired)
+
+        # Launch outside the lock; Chrome startup takes seconds.
+        profile = None
+        try:
+            profile = prepare_profile(provider, headless=self.headless)
+            with timing.span("chrome.launch"):
+                driver = get_driver(headless=self.headless, provider=provider, user_data_dir=profile)
+        except Exception:
+            remove_profile(profile)
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._uses[id(driver)] = 0
+            self._profiles[id(driver)] = profile
+        return driver
+
+    def checkin(self, driver, discard=False):
+        """
+        Returns a driver to the pool. Broken, worn out or explicitly discarded
+        drivers are quit instead.
+        """
+        if driver is None:
+            return
+
+        if not discard:
+            try:
+                reset_driver(driver)
+            except Exception as e:
+                logging.warning(f"Driver reset failed, discarding: {e}")
+                discard = True
+
+        retired = []
+        with self._cond:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            if discard or self._closed or uses >= self.max_uses:
+                retired.append(self._retire_locked(driver))
+            else:
+                self._idle.append((driver, time.monotonic()))
+            self._cond.notify()
+        self._quit(retired)
+
+    def reap_idle(self):
+        """
+        Quits drivers that have been idle longer than max_idle.
+        """
+        with self._cond:
+            retired = self._reap_idle_locked()
+        self._quit(retired)
+
+    def close_all(self):
+        """
+        Quits every idle driver and refuses new checkouts. Checked out drivers
+        are quit when they come back.
+        """
+        with self._cond:
+            self._closed = True
+            retired = [self._retire_locked(driver) for driver, _ in self._idle]
+            self._idle = []
+            self._cond.notify_all()
+        self._quit(retired)
+
+    def _reap_idle_locked(self):
+        now = time.monotonic()
+        keep = []
+        retired = []
+        for driver, last_used in self._idle:
+            if now - last_used > self.max_idle:
+                retired.append(self._retire_locked(driver))
+            else:
+                keep.append((driver, last_used))
+        self._idle = keep
+        return retired
+
+    def _retire_locked(self, driver):
+        """
+        Takes a driver off the pool's books and returns (driver, profile).
+        Quitting can take seconds, so callers pass the result to _quit()
+        after releasing the lock.
+        """
+        self._uses.pop(id(driver), None)
+        self._total -= 1
+        return driver, self._profiles.pop(id(driver), None)
+
+    def _quit(self, retired):
+        for driver, profile in retired:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            remove_profile(profile)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the process-wide driver pool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+def checkout_driver(provider=None):
+    return get_pool().checkout(provider=provider)
+
+def checkin_driver(driver, discard=False):
+    get_pool().checkin(driver, discard=discard)
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+atexit.register(shutdown_pool)
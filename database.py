@@ -1,11 +1,17 @@
 
+import logging
 import os
 import json
+import time
+import socket
+import threading
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from dotenv import load_dotenv
 
-load_dotenv()
+import startup
+import timing
+
+startup.load_env()
 
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -14,21 +20,116 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
 
 engine = None
 Session = None
+_init_lock = threading.Lock()
 
 def init_db():
     global engine, Session
     if not DATABASE_URL:
-        print("CRITICAL: DATABASE_URL is missing.")
+        logging.error("CRITICAL: DATABASE_URL is missing.")
         return
 
-    try:
-        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
-        session_factory = sessionmaker(bind=engine)
-        Session = scoped_session(session_factory)
-        print("Database initialized.")
-    except Exception as e:
-        print(f"Database initialization failed: {e}")
+    with _init_lock:
+        # Another worker thread may have initialized while we waited
+        if Session:
+            return
+        try:
+            engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
+            session_factory = sessionmaker(bind=engine)
+            Session = scoped_session(session_factory)
+            logging.info("Database initialized.")
+        except Exception as e:
+            logging.error(f"Database initialization failed: {e}")
+
+def parse_image_ids(raw_ids):
+    if not raw_ids:
+        return []
+    if isinstance(raw_ids, str):
+        raw_ids = json.loads(raw_ids)
+    return list(raw_ids or [])
+
+def resolve_image_urls(s, rows):
+    """
+    Resolves content_image_ids for a whole batch of job rows with a single
+    query, instead of one query per job.
+    Returns { publish_id: [image_url, ...] } with each list ordered by "order".
+    """
+    jobs_by_image = {}   # image id -> [publish_id, ...]
+    for row in rows:
+        try:
+            img_ids = parse_image_ids(row.content_image_ids)
+        except Exception as e:
+            logging.error(f"Error resolving images for job {row.publish_id}: {e}")
+            continue
+        for img_id in set(img_ids):
+            jobs_by_image.setdefault(img_id, []).append(row.publish_id)
+
+    if not jobs_by_image:
+        return {}
+
+    img_query = text("SELECT id, image_url FROM content_images WHERE id IN :ids ORDER BY \"order\" ASC")
+    img_rows = s.execute(img_query, {'ids': tuple(jobs_by_image)}).fetchall()
+
+    # Rows come back sorted by "order", so appending keeps per-job order
+    images_by_job = {}
+    for r in img_rows:
+        for publish_id in jobs_by_image.get(r.id, []):
+            images_by_job.setdefault(publish_id, []).append(r.image_url)
+    return images_by_job
+
+# Job details shared by get_scheduled_jobs and claim_jobs; callers add the WHERE clause.
+JOB_SELECT_SQL = """
+    SELECT 
+        pc.id as publish_id,
+        pc.content_image_ids,
+        pc.content_video_id,
 
+        pa.id as account_id,
+        -- Account whose credentials are actually used (child accounts
+        -- without their own login inherit the parent's)
+        CASE WHEN pa.blog_id IS NULL AND ppa.id IS NOT NULL
+             THEN ppa.id ELSE pa.id END as login_account_id,
+        COALESCE(pa.blog_id, ppa.blog_id) as blog_id,
+        COALESCE(pa.blog_pw, ppa.blog_pw) as blog_pw,
+        COALESCE(pa.blog_url, ppa.blog_url) as blog_url,
+        COALESCE(pa.category_no, ppa.category_no) as category_no,
+
+        ctp.content as content_html,
+
+        ct.content_title
+
+    FROM publish_contents pc
+    JOIN platform_accounts pa ON pc.platform_account_id = pa.id
+    LEFT JOIN platform_accounts ppa ON pa.parent_id = ppa.id
+    JOIN content_text_by_provider ctp ON pc.content_text_by_provider_id = ctp.id
+    JOIN content_texts ct ON ctp.content_text_id = ct.id
+"""
+
+def row_to_job(row, images):
+    """
+    One JOB_SELECT_SQL row as a job dict; images is its list of URL strings.
+    """
+    return {
+        'publish_id': row.publish_id,
+        'account_id': row.account_id,
+        'login_account_id': row.login_account_id,
+        'blog_id': row.blog_id,
+        'blog_pw': row.blog_pw,
+        'blog_url': row.blog_url,
+        'category_no': row.category_no,
+        'title': row.content_title,       # Now we have the title!
+        'content': row.content_html, 
+        'images': images,
+        'video': row.content_video_id
+    }
+
+def rows_to_jobs(s, rows):
+    """
+    Turns JOB_SELECT_SQL rows into job dicts, resolving images in one query.
+    """
+    images_by_job = resolve_image_urls(s, rows)
+    return [row_to_job(row, images_by_job.get(row.publish_id, [])) for row in rows]
+
+@timing.timed("db.get_scheduled_jobs")
 def get_scheduled_jobs(platform_provider_id):
     """
     Fetches jobs that are:
@@ -61,28 +162,7 @@ def get_scheduled_jobs(platform_provider_id):
         
 
         # Fetch Job Details including Title (from content_texts) and Content
-        query = text("""
-            SELECT 
-                pc.id as publish_id,
-                pc.content_image_ids,
-                pc.content_video_id,
-                
-                pa.id as account_id,
-                COALESCE(pa.blog_id, ppa.blog_id) as blog_id,
-                COALESCE(pa.blog_pw, ppa.blog_pw) as blog_pw,
-                COALESCE(pa.blog_url, ppa.blog_url) as blog_url,
-                COALESCE(pa.category_no, ppa.category_no) as category_no,
-                
-                ctp.content as content_html,
-                
-                ct.content_title
-                
-            FROM publish_contents pc
-            JOIN platform_accounts pa ON pc.platform_account_id = pa.id
-            LEFT JOIN platform_accounts ppa ON pa.parent_id = ppa.id
-            JOIN content_text_by_provider ctp ON pc.content_text_by_provider_id = ctp.id
-            JOIN content_texts ct ON ctp.content_text_id = ct.id
-            
+        query = text(JOB_SELECT_SQL + """
             WHERE pa.provider_id = :provider_id
               AND pc.publish_status_id = 1
               AND pc.reserved_at <= NOW()
@@ -90,47 +170,423 @@ def get_scheduled_jobs(platform_provider_id):
         
         result = s.execute(query, {'provider_id': platform_provider_id}).fetchall()
         
-        jobs = []
-        for row in result:
-            image_urls = []
-            # Resolve Image IDs to URLs
-            if row.content_image_ids:
-                try:
-                    img_ids = row.content_image_ids
-                    if isinstance(img_ids, str):
-                        img_ids = json.loads(img_ids)
-                    
-                    if img_ids:
-                        # Fetch URLs for these IDs
-                        # We have to do this in a loop or WHERE IN clause. 
-                        # Since list might be small, WHERE IN is better.
-                        # Note: Postgres/SQLAlchemy passing list to IN clause requires tuple or specific handling.
-                        # Easier to just run a quick query here since traffic is low.
-                        img_query = text("SELECT image_url FROM content_images WHERE id IN :ids ORDER BY \"order\" ASC")
-                        img_rows = s.execute(img_query, {'ids': tuple(img_ids)}).fetchall()
-                        image_urls = [r.image_url for r in img_rows]
-                except Exception as e:
-                    print(f"Error resolving images for job {row.publish_id}: {e}")
-
-            jobs.append({
-                'publish_id': row.publish_id,
-                'blog_id': row.blog_id,
-                'blog_pw': row.blog_pw,
-                'blog_url': row.blog_url,
-                'category_no': row.category_no,
-                'title': row.content_title,       # Now we have the title!
-                'content': row.content_html, 
-                'images': image_urls,             # List of URL strings
-                'video': row.content_video_id
-            })
-        return jobs
+        return rows_to_jobs(s, result)
         
     except Exception as e:
-        print(f"Error fetching jobs: {e}")
+        logging.error(f"Error fetching jobs: {e}")
         return []
     finally:
         Session.remove()
 
+# Identifies this process in publish_contents.claimed_by
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# How long a claim is held before other workers may take the job over
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "1800"))
+
+# Columns the claim/lease/retry logic adds to publish_contents
+CLAIM_COLUMNS = {
+    "claimed_by": "VARCHAR(255)",
+    "lease_expires_at": "TIMESTAMPTZ",
+    "retry_count": "INTEGER NOT NULL DEFAULT 0",
+}
+CLAIM_COLUMNS_SQL = """
+    SELECT column_name FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'publish_contents'
+"""
+_claim_schema_ready = False
+
+CLAIM_JOBS_SQL = """
+    WITH claimable AS (
+        SELECT pc.id
+        FROM publish_contents pc
+        JOIN platform_accounts pa ON pc.platform_account_id = pa.id
+        WHERE pa.provider_id = :provider_id
+          AND pc.publish_status_id = 1
+          AND pc.reserved_at <= NOW()
+          AND (pc.lease_expires_at IS NULL OR pc.lease_expires_at < NOW())
+        ORDER BY pc.reserved_at ASC, pc.id ASC
+        LIMIT :limit
+        FOR UPDATE OF pc SKIP LOCKED
+    )
+    UPDATE publish_contents pc
+    SET claimed_by = :worker_id,
+        lease_expires_at = NOW() + make_interval(secs => :lease_seconds)
+    FROM claimable
+    WHERE pc.id = claimable.id
+    RETURNING pc.id
+"""
+
+def missing_claim_columns_sql(existing):
+    """
+    ALTER TABLE statements for the claim columns not in `existing`.
+    """
+    return [
+        f"ALTER TABLE publish_contents ADD COLUMN IF NOT EXISTS {name} {ddl}"
+        for name, ddl in CLAIM_COLUMNS.items()
+        if name not in existing
+    ]
+
+def ensure_claim_schema(s):
+    """
+    Adds missing claim columns to publish_contents, checked once per process.
+    Looks at information_schema first: ALTER TABLE takes an ACCESS EXCLUSIVE
+    lock on the table even when the column already exists.
+    """
+    global _claim_schema_ready
+    if _claim_schema_ready:
+        return
+    existing = {r.column_name for r in s.execute(text(CLAIM_COLUMNS_SQL)).fetchall()}
+    for statement in missing_claim_columns_sql(existing):
+        logging.info(f"Migrating: {statement}")
+        s.execute(text(statement))
+    s.commit()
+    _claim_schema_ready = True
+
+@timing.timed("db.claim_jobs")
+def claim_jobs(platform_provider_id, worker_id=None, limit=20, lease_seconds=None):
+    """
+    Atomically claims up to `limit` due jobs for this worker and returns them
+    in the same shape as get_scheduled_jobs.
+
+    Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent workers on
+    other nodes never receive the same job. A claim is a lease: if the
+    worker dies, the job becomes claimable again once lease_expires_at passes.
+    """
+    if not Session:
+        init_db()
+    worker_id = worker_id or WORKER_ID
+    lease_seconds = lease_seconds or CLAIM_LEASE_SECONDS
+
+    s = Session()
+    claimed_ids = []
+    try:
+        ensure_claim_schema(s)
+
+        claim_query = text(CLAIM_JOBS_SQL)
+        claimed_ids = [r.id for r in s.execute(claim_query, {
+            'provider_id': platform_provider_id,
+            'worker_id': worker_id,
+            'limit': limit,
+            'lease_seconds': lease_seconds,
+        }).fetchall()]
+        s.commit()
+
+        if not claimed_ids:
+            return []
+
+        query = text(JOB_SELECT_SQL + """
+            WHERE pc.id IN :ids
+            ORDER BY pc.reserved_at ASC, pc.id ASC
+        """)
+        result = s.execute(query, {'ids': tuple(claimed_ids)}).fetchall()
+        return rows_to_jobs(s, result)
+
+    except Exception as e:
+        logging.error(f"Error claiming jobs: {e}")
+        s.rollback()
+        # Claimed but never returned: give them back instead of leaving them
+        # leased (and unrenewed) until the lease runs out
+        release_claims(claimed_ids, worker_id)
+        return []
+    finally:
+        Session.remove()
+
+@timing.timed("db.release_claims")
+def release_claims(publish_ids, worker_id=None):
+    """
+    Gives back claimed jobs that were not posted (e.g. on shutdown) so other
+    workers can pick them up without waiting for the lease to expire.
+    Only rows still pending and still held by this worker are touched.
+    """
+    if not publish_ids:
+        return
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        query = text("""
+            UPDATE publish_contents
+            SET claimed_by = NULL,
+                lease_expires_at = NULL
+            WHERE id IN :ids
+              AND claimed_by = :worker_id
+              AND publish_status_id = 1
+        """)
+        s.execute(query, {'ids': tuple(publish_ids), 'worker_id': worker_id or WORKER_ID})
+        s.commit()
+    except Exception as e:
+        logging.error(f"Error releasing claims: {e}")
+        s.rollback()
+    finally:
+        Session.remove()
+
+@timing.timed("db.renew_claims")
+def renew_claims(publish_ids, worker_id=None, lease_seconds=None):
+    """
+    Pushes lease_expires_at out again for jobs this worker still holds, so a
+    long batch isn't claimed by another node while its jobs wait locally.
+    Returns the number of leases renewed.
+    """
+    if not publish_ids:
+        return 0
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        query = text("""
+            UPDATE publish_contents
+            SET lease_expires_at = NOW() + make_interval(secs => :lease_seconds)
+            WHERE id IN :ids
+              AND claimed_by = :worker_id
+              AND publish_status_id = 1
+        """)
+        result = s.execute(query, {
+            'ids': tuple(publish_ids),
+            'worker_id': worker_id or WORKER_ID,
+            'lease_seconds': lease_seconds or CLAIM_LEASE_SECONDS,
+        })
+        s.commit()
+        return result.rowcount
+    except Exception as e:
+        logging.error(f"Error renewing claims: {e}")
+        s.rollback()
+        return 0
+    finally:
+        Session.remove()
+
+class LeaseRenewer:
+    """
+    Renews the leases of this process's claimed jobs every
+    CLAIM_RENEW_INTERVAL seconds (default: a third of the lease) until they
+    are discarded, so jobs queued behind a slow batch keep their claim.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or float(os.getenv("CLAIM_RENEW_INTERVAL", str(CLAIM_LEASE_SECONDS / 3)))
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-renewer", daemon=True)
+        self._thread.start()
+
+    def add(self, publish_ids):
+        with self._lock:
+            self._ids.update(publish_ids)
+
+    def discard(self, publish_ids):
+        with self._lock:
+            self._ids.difference_update(publish_ids)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                ids = list(self._ids)
+            if ids:
+                renewed = renew_claims(ids)
+                logging.info(f"Renewed {renewed}/{len(ids)} claim leases.")
+
+# Channel the scheduler LISTENs on; fired when a pending job is added or rescheduled
+NOTIFY_CHANNEL = "publish_contents_pending"
+
+NOTIFY_TRIGGER_SQL = """
+    CREATE OR REPLACE FUNCTION notify_publish_contents_pending() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('""" + NOTIFY_CHANNEL + """', NEW.id::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger WHERE tgname = 'publish_contents_pending_notify'
+        ) THEN
+            CREATE TRIGGER publish_contents_pending_notify
+            AFTER INSERT OR UPDATE OF reserved_at, publish_status_id ON publish_contents
+            FOR EACH ROW WHEN (NEW.publish_status_id = 1)
+            EXECUTE PROCEDURE notify_publish_contents_pending();
+        END IF;
+    END;
+    $$;
+"""
+
+def ensure_notify_trigger():
+    """
+    Installs the NOTIFY trigger on publish_contents (idempotent).
+    """
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        s.execute(text(NOTIFY_TRIGGER_SQL))
+        s.commit()
+        return True
+    except Exception as e:
+        logging.error(f"Error installing notify trigger: {e}")
+        s.rollback()
+        return False
+    finally:
+        Session.remove()
+
+def open_listener(channel=NOTIFY_CHANNEL):
+    """
+    Returns a dedicated autocommit DBAPI connection LISTENing on channel.
+    The caller polls it (select + poll()) and closes it when done.
+    """
+    if not engine:
+        init_db()
+    conn = engine.raw_connection()
+    # Keep this connection out of the pool; it stays in LISTEN/autocommit mode.
+    conn.detach()
+    dbapi_conn = conn.dbapi_connection if hasattr(conn, "dbapi_connection") else conn.connection
+    dbapi_conn.autocommit = True
+    cur = dbapi_conn.cursor()
+    cur.execute(f"LISTEN {channel};")
+    cur.close()
+    return dbapi_conn
+
+@timing.timed("db.get_seconds_until_due")
+def get_seconds_until_due(platform_provider_ids):
+    """
+    Returns { provider_id: seconds } until the next claimable pending job of
+    each provider (<= 0 means due now). Providers with nothing pending are absent.
+    Time is measured on the DB clock so worker clock skew doesn't matter.
+    """
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        ensure_claim_schema(s)
+        query = text("""
+            SELECT
+                pa.provider_id,
+                EXTRACT(EPOCH FROM (
+                    MIN(GREATEST(pc.reserved_at, COALESCE(pc.lease_expires_at, pc.reserved_at))) - NOW()
+                )) as seconds
+            FROM publish_contents pc
+            JOIN platform_accounts pa ON pc.platform_account_id = pa.id
+            WHERE pa.provider_id IN :provider_ids
+              AND pc.publish_status_id = 1
+            GROUP BY pa.provider_id
+        """)
+        rows = s.execute(query, {'provider_ids': tuple(platform_provider_ids)}).fetchall()
+        return {r.provider_id: float(r.seconds) for r in rows if r.seconds is not None}
+    except Exception as e:
+        logging.error(f"Error fetching next due time: {e}")
+        return {}
+    finally:
+        Session.remove()
+
+RATE_LIMIT_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+        key VARCHAR(255) PRIMARY KEY,
+        tokens DOUBLE PRECISION NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL
+    );
+"""
+_rate_limit_schema_ready = False
+
+# Refills the bucket for the time since its last use and takes one token, in
+# one atomic upsert. tokens may go negative: that is a reservation, and the
+# caller waits -tokens / rate seconds before using it.
+TAKE_TOKEN_SQL = """
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (:key, :capacity - 1, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE
+    SET tokens = LEAST(
+            :capacity,
+            b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate
+        ) - 1,
+        updated_at = clock_timestamp()
+    RETURNING tokens
+"""
+
+def take_rate_limit_token(key, rate, capacity):
+    """
+    Takes one token from the shared bucket `key` (refilling at `rate` tokens
+    per second up to `capacity`) and returns the tokens left; negative means
+    the caller must wait. Shared by every worker process using this database.
+    """
+    global _rate_limit_schema_ready
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        if not _rate_limit_schema_ready:
+            s.execute(text(RATE_LIMIT_SCHEMA_SQL))
+            s.commit()
+            _rate_limit_schema_ready = True
+        tokens = s.execute(text(TAKE_TOKEN_SQL), {
+            'key': key,
+            'rate': rate,
+            'capacity': capacity,
+        }).scalar()
+        s.commit()
+        return tokens
+    except Exception:
+        s.rollback()
+        raise
+    finally:
+        Session.remove()
+
+def group_status_from_stats(stats):
+    """
+    Maps a group's post counts to its publish_status_id, or None if unchanged.
+    """
+    if stats.failed > 0:
+        if stats.failed == stats.total:
+            return 5 # total_failed (전체 실패)
+        return 4 # partial_failed (부분 실패)
+    if stats.published == stats.total:
+        return 3 # published (발행완료)
+    return None
+
+def roll_up_group_status(s, group_ids):
+    """
+    Recomputes publish_contents_groups status for the given groups with one
+    aggregate query, within the caller's transaction.
+    """
+    if not group_ids:
+        return
+    check_query = text("""
+        SELECT 
+            group_id,
+            COUNT(*) as total,
+            SUM(CASE WHEN publish_status_id = 3 THEN 1 ELSE 0 END) as published,
+            SUM(CASE WHEN publish_status_id = 2 THEN 1 ELSE 0 END) as failed
+        FROM publish_contents 
+        WHERE group_id IN :group_ids
+        GROUP BY group_id
+    """)
+    group_update = text("""
+        UPDATE publish_contents_groups
+        SET publish_status_id = :new_status
+        WHERE id = :group_id
+    """)
+    for stats in s.execute(check_query, {'group_ids': tuple(group_ids)}).fetchall():
+        new_group_status = group_status_from_stats(stats)
+        if new_group_status:
+            logging.info(f"Group {stats.group_id} status updated to {new_group_status}")
+            s.execute(group_update, {'group_id': stats.group_id, 'new_status': new_group_status})
+
+UPDATE_JOB_STATUS_SQL = """
+    UPDATE publish_contents
+    SET publish_status_id = :status_id,
+        fail_reason = :fail_reason,
+        published_at = NOW(),
+        updated_at = NOW(),
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = :publish_id
+      -- A job whose lease was taken over by another worker is theirs now
+      AND (claimed_by = :worker_id OR claimed_by IS NULL)
+"""
+
+@timing.timed("db.update_job_status")
 def update_job_status(publish_id, status_id, fail_reason=None):
     """
     Updates the job status.
@@ -140,61 +596,182 @@ def update_job_status(publish_id, status_id, fail_reason=None):
         init_db()
     s = Session()
     try:
+        ensure_claim_schema(s)
 
         # 1. Update the individual job status
-        query = text("""
-            UPDATE publish_contents
-            SET publish_status_id = :status_id,
-                fail_reason = :fail_reason,
-                published_at = NOW(),
-                updated_at = NOW()
-            WHERE id = :publish_id
-            RETURNING group_id
-        """)
+        query = text(UPDATE_JOB_STATUS_SQL + " RETURNING group_id")
         result = s.execute(query, {
             'status_id': status_id, 
             'fail_reason': fail_reason, 
-            'publish_id': publish_id
+            'publish_id': publish_id,
+            'worker_id': WORKER_ID,
         })
         
         row = result.fetchone()
+        if row is None:
+            logging.warning(f"Job {publish_id} is no longer claimed by this worker; status not written.")
         group_id = row.group_id if row else None
         
         # 2. Check if Group Status needs update
         if group_id:
-            # Check status counts in this group
-            check_query = text("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN publish_status_id = 3 THEN 1 ELSE 0 END) as published,
-                    SUM(CASE WHEN publish_status_id = 2 THEN 1 ELSE 0 END) as failed
-                FROM publish_contents 
-                WHERE group_id = :group_id
-            """)
-            stats = s.execute(check_query, {'group_id': group_id}).fetchone()
-            
-            new_group_status = None
-            
-            if stats.failed > 0:
-                if stats.failed == stats.total:
-                    new_group_status = 5 # total_failed (전체 실패)
-                else:
-                    new_group_status = 4 # partial_failed (부분 실패)
-            elif stats.published == stats.total:
-                new_group_status = 3 # published (발행완료)
-            
-            if new_group_status:
-                print(f"Group {group_id} status updated to {new_group_status}")
-                group_update = text("""
-                    UPDATE publish_contents_groups
-                    SET publish_status_id = :new_status
-                    WHERE id = :group_id
-                """)
-                s.execute(group_update, {'group_id': group_id, 'new_status': new_group_status})
+            roll_up_group_status(s, [group_id])
                 
         s.commit()
     except Exception as e:
-        print(f"Error updating job {publish_id}: {e}")
+        logging.error(f"Error updating job {publish_id}: {e}")
         s.rollback()
     finally:
         Session.remove()
+
+# Puts a failed job back to pending with reserved_at pushed out by
+# base * 2^retry_count (capped, +-50% jitter), or fails it for good once
+# max_retries is used up. Right-hand sides see the row's old values.
+RESCHEDULE_JOB_SQL = """
+    UPDATE publish_contents
+    SET publish_status_id = CASE WHEN retry_count < :max_retries THEN 1 ELSE 2 END,
+        reserved_at = CASE WHEN retry_count < :max_retries
+            THEN NOW() + make_interval(secs =>
+                LEAST(:max_seconds, :base_seconds * power(2, retry_count)) * (0.5 + random()))
+            ELSE reserved_at END,
+        published_at = CASE WHEN retry_count < :max_retries THEN published_at ELSE NOW() END,
+        retry_count = retry_count + 1,
+        fail_reason = :fail_reason,
+        updated_at = NOW(),
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = :publish_id
+      AND (claimed_by = :worker_id OR claimed_by IS NULL)
+    RETURNING publish_status_id, retry_count, reserved_at, group_id
+"""
+
+@timing.timed("db.reschedule_job")
+def reschedule_job(publish_id, fail_reason, max_retries, base_seconds, max_seconds):
+    """
+    Schedules another attempt for a transiently failed job.
+    Returns True if it was rescheduled, False if it ran out of retries and
+    was marked failed (status 2).
+    """
+    if not Session:
+        init_db()
+    s = Session()
+    try:
+        ensure_claim_schema(s)
+        row = s.execute(text(RESCHEDULE_JOB_SQL), {
+            'publish_id': publish_id,
+            'worker_id': WORKER_ID,
+            'fail_reason': fail_reason,
+            'max_retries': max_retries,
+            'base_seconds': base_seconds,
+            'max_seconds': max_seconds,
+        }).fetchone()
+        if row is None:
+            s.commit()
+            return False
+
+        retried = row.publish_status_id == 1
+        if not retried and row.group_id:
+            roll_up_group_status(s, [row.group_id])
+        s.commit()
+        if retried:
+            logging.info(f"Job {publish_id} rescheduled (attempt {row.retry_count + 1}) for {row.reserved_at}.")
+        else:
+            logging.warning(f"Job {publish_id} failed after {row.retry_count} attempts.")
+        return retried
+    except Exception as e:
+        logging.error(f"Error rescheduling job {publish_id}: {e}")
+        s.rollback()
+        # Fall back to the old behaviour rather than leaving the job claimed
+        update_job_status(publish_id, 2, fail_reason)
+        return False
+    finally:
+        Session.remove()
+
+class StatusWriter:
+    """
+    Buffers job results and writes them in one transaction per flush, rolling
+    up each affected group once per flush instead of once per post.
+
+    Flushes when STATUS_FLUSH_SIZE results are buffered, when the oldest has
+    waited STATUS_FLUSH_INTERVAL seconds, and on close().
+    """
+
+    def __init__(self, max_size=None, max_age=None):
+        self.max_size = max_size or int(os.getenv("STATUS_FLUSH_SIZE", "20"))
+        self.max_age = max_age or float(os.getenv("STATUS_FLUSH_INTERVAL", "5"))
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="status-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, publish_id, status_id, fail_reason=None):
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append({
+                'publish_id': publish_id,
+                'status_id': status_id,
+                'fail_reason': fail_reason,
+            })
+            full = len(self._buffer) >= self.max_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes everything buffered so far. Safe to call from any thread.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._oldest = None
+            if batch:
+                self._write(batch)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=self.max_age + 1)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(min(self.max_age, 1)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.max_age
+            if due:
+                self.flush()
+
+    @timing.timed("db.write_statuses")
+    def _write(self, batch):
+        if not Session:
+            init_db()
+        s = Session()
+        try:
+            ensure_claim_schema(s)
+            # A job reported twice in one batch keeps its last result
+            latest = {}
+            for item in batch:
+                latest[item['publish_id']] = dict(item, worker_id=WORKER_ID)
+            params = list(latest.values())
+
+            s.execute(text(UPDATE_JOB_STATUS_SQL), params)
+
+            group_query = text("""
+                SELECT DISTINCT group_id FROM publish_contents
+                WHERE id IN :ids AND group_id IS NOT NULL
+            """)
+            group_ids = [r.group_id for r in s.execute(group_query, {'ids': tuple(latest)}).fetchall()]
+            roll_up_group_status(s, group_ids)
+
+            s.commit()
+            logging.info(f"Flushed {len(params)} job statuses ({len(group_ids)} groups).")
+        except Exception as e:
+            logging.error(f"Error flushing {len(batch)} job statuses, retrying one by one: {e}")
+            s.rollback()
+            Session.remove()
+            # Don't lose results because one row is bad
+            for item in batch:
+                update_job_status(item['publish_id'], item['status_id'], item['fail_reason'])
+        finally:
+            Session.remove()
@@ -0,0 +1,324 @@
+"""
+asyncio data access for the job queue, alongside the synchronous database.py.
+
+Same tables, same SQL semantics (claims, leases, group roll-up); the
+difference is that nothing here blocks a thread, so an asyncio orchestrator
+can keep claiming and writing statuses while browser workers post.
+
+Uses SQLAlchemy's asyncio engine on asyncpg:
+- the pool is sized explicitly (ASYNC_DB_POOL_SIZE / ASYNC_DB_MAX_OVERFLOW)
+  instead of SQLAlchemy's defaults;
+- every statement runs as a server-side prepared statement, cached per
+  connection (ASYNC_DB_STATEMENT_CACHE_SIZE). List parameters use
+  `= ANY(:ids)` rather than `IN :ids`, so a query's text (and its prepared
+  statement) doesn't change with the number of ids.
+
+The engine belongs to the event loop that first uses it; call dispose()
+before that loop closes.
+"""
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import database
+import timing
+
+# Connections kept open, and extra ones allowed under load (closed when returned)
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "5"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "0"))
+# Seconds to wait for a free connection before giving up
+ASYNC_DB_POOL_TIMEOUT = float(os.getenv("ASYNC_DB_POOL_TIMEOUT", "30"))
+# Prepared statements cached per connection
+ASYNC_DB_STATEMENT_CACHE_SIZE = int(os.getenv("ASYNC_DB_STATEMENT_CACHE_SIZE", "256"))
+
+engine = None
+_init_lock = asyncio.Lock()
+
+IMAGE_URLS_SQL = """
+    SELECT id, image_url FROM content_images
+    WHERE id = ANY(:ids)
+    ORDER BY "order" ASC
+"""
+
+SCHEDULED_JOBS_SQL = database.JOB_SELECT_SQL + """
+    WHERE pa.provider_id = :provider_id
+      AND pc.publish_status_id = 1
+      AND pc.reserved_at <= NOW()
+"""
+
+CLAIMED_JOBS_SQL = database.JOB_SELECT_SQL + """
+    WHERE pc.id = ANY(:ids)
+    ORDER BY pc.reserved_at ASC, pc.id ASC
+"""
+
+RELEASE_CLAIMS_SQL = """
+    UPDATE publish_contents
+    SET claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = ANY(:ids)
+      AND claimed_by = :worker_id
+      AND publish_status_id = 1
+"""
+
+GROUP_IDS_SQL = """
+    SELECT DISTINCT group_id FROM publish_contents
+    WHERE id = ANY(:ids) AND group_id IS NOT NULL
+"""
+
+GROUP_STATS_SQL = """
+    SELECT
+        group_id,
+        COUNT(*) as total,
+        SUM(CASE WHEN publish_status_id = 3 THEN 1 ELSE 0 END) as published,
+        SUM(CASE WHEN publish_status_id = 2 THEN 1 ELSE 0 END) as failed
+    FROM publish_contents
+    WHERE group_id = ANY(:group_ids)
+    GROUP BY group_id
+"""
+
+GROUP_UPDATE_SQL = """
+    UPDATE publish_contents_groups
+    SET publish_status_id = :new_status
+    WHERE id = :group_id
+"""
+
+def async_database_url(url):
+    """
+    Converts a DATABASE_URL for asyncpg. Returns (url, connect_args): libpq
+    query options asyncpg doesn't understand (sslmode, options=-c...) are
+    moved into connect arguments.
+    """
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(url.query)
+    connect_args = {}
+
+    options = query.pop("options", None)
+    if options:
+        server_settings = {}
+        for option in options.replace("-c ", "-c").split():
+            if option.startswith("-c") and "=" in option:
+                key, value = option[2:].split("=", 1)
+                server_settings[key] = value
+        if server_settings:
+            connect_args["server_settings"] = server_settings
+
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+
+    query["prepared_statement_cache_size"] = str(ASYNC_DB_STATEMENT_CACHE_SIZE)
+    return url.set(query=query), connect_args
+
+async def init_db():
+    global engine
+    if not database.DATABASE_URL:
+        logging.error("CRITICAL: DATABASE_URL is missing.")
+        return
+
+    async with _init_lock:
+        if engine:
+            return
+        try:
+            url, connect_args = async_database_url(database.DATABASE_URL)
+            engine = create_async_engine(
+                url,
+                connect_args=connect_args,
+                pool_size=ASYNC_DB_POOL_SIZE,
+                max_overflow=ASYNC_DB_MAX_OVERFLOW,
+                pool_timeout=ASYNC_DB_POOL_TIMEOUT,
+                pool_pre_ping=True,
+                pool_recycle=3600,
+            )
+            logging.info(f"Async database initialized (pool {ASYNC_DB_POOL_SIZE}+{ASYNC_DB_MAX_OVERFLOW}).")
+        except Exception as e:
+            logging.error(f"Async database initialization failed: {e}")
+
+async def dispose():
+    """
+    Closes every pooled connection.
+    """
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+_claim_schema_ready = False
+
+async def ensure_claim_schema(conn):
+    """
+    Adds missing claim columns to publish_contents, checked once per process
+    (see database.ensure_claim_schema).
+    """
+    global _claim_schema_ready
+    if _claim_schema_ready:
+        return
+    result = await conn.execute(text(database.CLAIM_COLUMNS_SQL))
+    existing = {r.column_name for r in result.fetchall()}
+    for statement in database.missing_claim_columns_sql(existing):
+        logging.info(f"Migrating: {statement}")
+        await conn.execute(text(statement))
+    await conn.commit()
+    _claim_schema_ready = True
+
+async def resolve_image_urls(conn, rows):
+    """
+    Async counterpart of database.resolve_image_urls: one query for the
+    whole batch. Returns { publish_id: [image_url, ...] }.
+    """
+    jobs_by_image = {}
+    for row in rows:
+        try:
+            img_ids = database.parse_image_ids(row.content_image_ids)
+        except Exception as e:
+            logging.error(f"Error resolving images for job {row.publish_id}: {e}")
+            continue
+        for img_id in set(img_ids):
+            jobs_by_image.setdefault(img_id, []).append(row.publish_id)
+
+    if not jobs_by_image:
+        return {}
+
+    result = await conn.execute(text(IMAGE_URLS_SQL), {'ids': list(jobs_by_image)})
+    images_by_job = {}
+    for r in result.fetchall():
+        for publish_id in jobs_by_image.get(r.id, []):
+            images_by_job.setdefault(publish_id, []).append(r.image_url)
+    return images_by_job
+
+async def rows_to_jobs(conn, rows):
+    images_by_job = await resolve_image_urls(conn, rows)
+    return [database.row_to_job(row, images_by_job.get(row.publish_id, [])) for row in rows]
+
+async def roll_up_group_status(conn, group_ids):
+    """
+    Recomputes publish_contents_groups status for the given groups, within
+    the caller's transaction.
+    """
+    if not group_ids:
+        return
+    result = await conn.execute(text(GROUP_STATS_SQL), {'group_ids': list(group_ids)})
+    for stats in result.fetchall():
+        new_group_status = database.group_status_from_stats(stats)
+        if new_group_status:
+            logging.info(f"Group {stats.group_id} status updated to {new_group_status}")
+            await conn.execute(text(GROUP_UPDATE_SQL), {'group_id': stats.group_id, 'new_status': new_group_status})
+
+@timing.timed("db.async.get_scheduled_jobs")
+async def get_scheduled_jobs(platform_provider_id):
+    """
+    Due pending jobs of a provider, without claiming them.
+    Same result shape as database.get_scheduled_jobs.
+    """
+    if not engine:
+        await init_db()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text(SCHEDULED_JOBS_SQL), {'provider_id': platform_provider_id})
+            return await rows_to_jobs(conn, result.fetchall())
+    except Exception as e:
+        logging.error(f"Error fetching jobs: {e}")
+        return []
+
+@timing.timed("db.async.claim_jobs")
+async def claim_jobs(platform_provider_id, worker_id=None, limit=20, lease_seconds=None):
+    """
+    Atomically claims up to `limit` due jobs (FOR UPDATE SKIP LOCKED, leased
+    like database.claim_jobs) and returns them.
+    """
+    if not engine:
+        await init_db()
+    worker_id = worker_id or database.WORKER_ID
+    lease_seconds = lease_seconds or database.CLAIM_LEASE_SECONDS
+
+    claimed_ids = []
+    try:
+        async with engine.connect() as conn:
+            await ensure_claim_schema(conn)
+            result = await conn.execute(text(database.CLAIM_JOBS_SQL), {
+                'provider_id': platform_provider_id,
+                'worker_id': worker_id,
+                'limit': limit,
+                'lease_seconds': float(lease_seconds),
+            })
+            claimed_ids = [r.id for r in result.fetchall()]
+            await conn.commit()
+
+            if not claimed_ids:
+                return []
+            result = await conn.execute(text(CLAIMED_JOBS_SQL), {'ids': claimed_ids})
+            return await rows_to_jobs(conn, result.fetchall())
+    except Exception as e:
+        logging.error(f"Error claiming jobs: {e}")
+        # Claimed but never returned: give them back instead of leaving them
+        # leased (and unrenewed) until the lease runs out
+        await release_claims(claimed_ids, worker_id)
+        return []
+
+@timing.timed("db.async.release_claims")
+async def release_claims(publish_ids, worker_id=None):
+    """
+    Gives back claimed jobs that were not posted.
+    """
+    if not publish_ids:
+        return
+    if not engine:
+        await init_db()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(RELEASE_CLAIMS_SQL), {
+                'ids': list(publish_ids),
+                'worker_id': worker_id or database.WORKER_ID,
+            })
+    except Exception as e:
+        logging.error(f"Error releasing claims: {e}")
+
+@timing.timed("db.async.update_job_status")
+async def update_job_status(publish_id, status_id, fail_reason=None):
+    """
+    Sets one job's status and rolls up its group, in one transaction.
+    """
+    await update_job_statuses([{
+        'publish_id': publish_id,
+        'status_id': status_id,
+        'fail_reason': fail_reason,
+    }])
+
+@timing.timed("db.async.write_statuses")
+async def update_job_statuses(batch):
+    """
+    Writes a batch of results ({publish_id, status_id, fail_reason}) with one
+    executemany and rolls up each affected group once, like
+    database.StatusWriter. Falls back to one transaction per job if the batch
+    fails, so one bad row doesn't lose the others.
+    """
+    if not batch:
+        return
+    if not engine:
+        await init_db()
+    # A job reported twice in one batch keeps its last result
+    latest = {}
+    for item in batch:
+        latest[item['publish_id']] = dict(item, worker_id=database.WORKER_ID)
+    params = list(latest.values())
+
+    try:
+        async with engine.connect() as conn:
+            await ensure_claim_schema(conn)
+            await conn.execute(text(database.UPDATE_JOB_STATUS_SQL), params)
+            result = await conn.execute(text(GROUP_IDS_SQL), {'ids': list(latest)})
+            group_ids = [r.group_id for r in result.fetchall()]
+            await roll_up_group_status(conn, group_ids)
+            await conn.commit()
+        if len(params) > 1:
+            logging.info(f"Flushed {len(params)} job statuses ({len(group_ids)} groups).")
+    except Exception as e:
+        if len(params) == 1:
+            logging.error(f"Error updating job {params[0]['publish_id']}: {e}")
+            return
+        logging.error(f"Error flushing {len(params)} job statuses, retrying one by one: {e}")
+        for item in params:
+            await update_job_statuses([item])
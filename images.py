@@ -0,0 +1,174 @@
+import logging
+import os
+import time
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Disk cache shared by every job and account on this node.
+#   blobs/<sha256 of content><ext>  - image bytes, content addressed
+#   urls/<sha256 of url>            - which blob a URL resolved to
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "20"))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=IMAGE_FETCH_WORKERS, pool_maxsize=IMAGE_FETCH_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _blob_dir():
+    return os.path.join(IMAGE_CACHE_DIR, "blobs")
+
+def _url_dir():
+    return os.path.join(IMAGE_CACHE_DIR, "urls")
+
+def _guess_extension(url, content_type):
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext in (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"):
+        return ext
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if guessed:
+            return guessed
+    return ".img"
+
+def _write_atomic(path, data, mode="wb"):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, mode) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _touch(path):
+    # mtime doubles as "last used" for LRU eviction
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def lookup(url):
+    """
+    Returns the cached local path for url, or None on a miss.
+    """
+    index_path = os.path.join(_url_dir(), _sha256(url.encode("utf-8")))
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            blob_name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    blob_path = os.path.join(_blob_dir(), blob_name)
+    if not os.path.exists(blob_path):
+        return None
+    _touch(blob_path)
+    return blob_path
+
+def fetch(url):
+    """
+    Returns a local path for url, downloading it on a cache miss.
+    Identical images behind different URLs share one blob.
+    """
+    cached = lookup(url)
+    if cached:
+        return cached
+
+    response = get_session().get(url, timeout=IMAGE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    data = response.content
+
+    blob_name = _sha256(data) + _guess_extension(url, response.headers.get("Content-Type"))
+    blob_path = os.path.join(_blob_dir(), blob_name)
+    os.makedirs(_blob_dir(), exist_ok=True)
+    os.makedirs(_url_dir(), exist_ok=True)
+    if os.path.exists(blob_path):
+        _touch(blob_path)
+    else:
+        _write_atomic(blob_path, data)
+    _write_atomic(os.path.join(_url_dir(), _sha256(url.encode("utf-8"))), blob_name, mode="w")
+    return blob_path
+
+def evict(max_bytes=None):
+    """
+    Deletes least recently used blobs until the cache fits in max_bytes.
+    URL index entries pointing at evicted blobs are treated as misses.
+    """
+    max_bytes = max_bytes if max_bytes is not None else IMAGE_CACHE_MAX_BYTES
+    try:
+        entries = []
+        with os.scandir(_blob_dir()) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    if removed:
+        logging.info(f"Image cache: evicted {removed} blobs.")
+    return removed
+
+def prefetch_images(jobs, workers=None):
+    """
+    Downloads every image of a batch of jobs concurrently, before any browser
+    starts, and sets job['image_paths'] (same order as job['images'];
+    None where a download failed).
+    """
+    urls = []
+    seen = set()
+    for job in jobs:
+        for url in job.get('images') or []:
+            if url not in seen:
+                seen.add(url)
+                urls.append(url)
+    if not urls:
+        for job in jobs:
+            job['image_paths'] = []
+        return {}
+
+    started = time.monotonic()
+    paths = {}
+
+    def _fetch(url):
+        try:
+            return url, fetch(url)
+        except Exception as e:
+            logging.warning(f"Image prefetch failed for {url}: {e}")
+            return url, None
+
+    with ThreadPoolExecutor(max_workers=workers or IMAGE_FETCH_WORKERS, thread_name_prefix="image-fetch") as executor:
+        for url, path in executor.map(_fetch, urls):
+            paths[url] = path
+
+    for job in jobs:
+        job['image_paths'] = [paths.get(url) for url in job.get('images') or []]
+
+    evict()
+    logging.info(f"Prefetched {len(urls)} images for {len(jobs)} jobs in {time.monotonic() - started:.1f}s.")
+    return paths
@@ -0,0 +1,93 @@
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import timing
+
+LOG_FILE = os.getenv("LOG_FILE", "automation.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Records waiting for the writer thread; beyond this they are dropped rather
+# than blocking a posting step.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_listener = None
+
+class JobContextFilter(logging.Filter):
+    """
+    Stamps each record with the job it was logged for (provider, publish_id,
+    account_id from timing.job_context). Runs on the thread that logs,
+    before the record is queued.
+    """
+
+    def filter(self, record):
+        context = timing.current_context()
+        record.provider = context.get("provider", "")
+        record.publish_id = context.get("publish_id", "")
+        record.account_id = context.get("account_id", "")
+        parts = [record.provider]
+        if record.publish_id:
+            parts.append(f"#{record.publish_id}")
+        if record.account_id:
+            parts.append(f"acct {record.account_id}")
+        record.job = f"[{' '.join(p for p in parts if p)}] " if any(parts) else ""
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never waits: when the queue is full the record is
+    counted and dropped.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def setup_logging():
+    """
+    Routes the root logger through a queue: callers only enqueue, and a
+    listener thread does the formatting-to-disk and console writes.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(threadName)s - %(job)s%(message)s')
+    c_handler = logging.StreamHandler()
+    # RotatingFileHandler: Max 1MB per file, keeps last 3 backup files (automation.log, automation.log.1, ...)
+    f_handler = RotatingFileHandler(LOG_FILE, maxBytes=1024*1024, backupCount=3, encoding='utf-8')
+    for handler in (c_handler, f_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(JobContextFilter())
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, c_handler, f_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+def shutdown_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,84 +1,385 @@
 
-import time
 import os
-import pytz
+import sys
+import signal
+import threading
 from datetime import datetime
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import database
-import naver.poster
-import tistory.poster
+import startup
 
-# Configure Logging
-# Configure Logging
+# Every module reads its settings at import, so .env goes in first (once).
+startup.load_env()
+
+import pipeline
+import retry
+import timing
+
+# Configure Logging: records are queued and written by a listener thread,
+# so a slow disk or console never stalls a posting step.
 import logging
-from logging.handlers import RotatingFileHandler
+import log_setup
+
+with startup.step("logging setup"):
+    log_setup.setup_logging()
+
+# database (SQLAlchemy), images (requests), browser and the posters (Selenium,
+# undetected_chromedriver) are imported where they are first needed, so the
+# worker is up before any of them load. See --import-profile.
+
+
+PROVIDER_NAVER = 19
+PROVIDER_TISTORY = 8
+
+# provider_id -> (poster module, single post function, batch function)
+POSTERS = {
+    PROVIDER_NAVER: ("naver.poster", "post_naver", "post_naver_batch"),
+    PROVIDER_TISTORY: ("tistory.poster", "post_tistory", "post_tistory_batch"),
+}
+
+def get_poster(provider_id):
+    """
+    (post_job, post_batch) for a provider, importing its poster on first use.
+    """
+    module_name, post_job, post_batch = POSTERS[provider_id]
+    module = startup.import_module(module_name)
+    return getattr(module, post_job), getattr(module, post_batch)
+
+def get_renderer(provider_id):
+    """
+    The poster's render_job(job), which prepares provider-specific content.
+    """
+    return startup.import_module(POSTERS[provider_id][0]).render_job
+
+# SCHEDULER_MODE=event: run as soon as a job is due (wakes on Postgres NOTIFY).
+# SCHEDULER_MODE=slots: legacy fixed slots, Naver at :00/:30, Tistory at :15/:45.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "event").lower()
+
+# BATCH_MODE=true: jobs sharing a login are posted in one browser session.
+BATCH_MODE = os.getenv("BATCH_MODE", "true").lower() == "true"
+
+# PIPELINE_MODE=true: claim, image prefetch, render, post and status writes
+# run as concurrent stages with bounded queues (run_pipeline) instead of one
+# claimed batch at a time.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "false").lower() == "true"
+
+def group_jobs_by_login(jobs):
+    """
+    Groups jobs by the credentials they log in with, so child accounts that
+    resolve to the same parent login land in the same group.
+    Group order follows the first job of each group.
+    """
+    groups = {}
+    for job in jobs:
+        key = (job.get('login_account_id'), job.get('blog_id'), job.get('blog_pw'))
+        groups.setdefault(key, []).append(job)
+    return list(groups.values())
+
+# Buffers results and writes them in batches; set up in __main__.
+status_writer = None
+# Keeps claim leases alive while claimed jobs wait or post; set up in __main__.
+lease_renewer = None
+
+def classify_result(job, success):
+    """
+    Classifies one job's result (see retry.py) and feeds the provider's
+    circuit breaker. Must run on the thread that posted the job, since
+    failure notes are per thread.
+    Returns (status_id, fail_reason, transient).
+    """
+    provider = timing.current_context().get("provider")
+    if success:
+        status_id, fail_reason = 3, None
+    else:
+        kind, detail = retry.last_failure()
+        status_id, fail_reason = 2, retry.describe(kind, detail)
+        logging.warning(f"Job {job['publish_id']} failed: {fail_reason}")
+    if provider and (success or kind not in retry.ACCOUNT_FAILURES):
+        retry.get_breaker(provider).record(success)
+    return status_id, fail_reason, not success and retry.is_transient(kind)
+
+def write_result(job, status_id, fail_reason, transient):
+    """
+    Stores a classified result: transient failures are rescheduled with
+    backoff, everything else is written (batched when status_writer is set).
+    """
+    database = startup.import_module("database")
+    if transient:
+        database.reschedule_job(
+            job['publish_id'], fail_reason,
+            retry.RETRY_MAX_ATTEMPTS, retry.RETRY_BASE_SECONDS, retry.RETRY_MAX_SECONDS,
+        )
+    elif status_writer:
+        status_writer.add(job['publish_id'], status_id, fail_reason)
+    else:
+        database.update_job_status(job['publish_id'], status_id, fail_reason)
+
+def report_result(job, success):
+    """
+    Records one job's result. Failures are classified (see retry.py):
+    transient ones are rescheduled with backoff, permanent ones fail the job.
+    """
+    write_result(job, *classify_result(job, success))
+
+# Jobs claimed from the shared queue per round trip
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "20"))
+
+# WORKER_COUNT: number of accounts posted in parallel, each with its own Chrome.
+WORKER_COUNT = max(1, int(os.getenv("WORKER_COUNT", "1")))
+
+# Set on SIGINT/SIGTERM: no new work is started, in-flight posts finish.
+shutdown_event = threading.Event()
+
+_account_locks = {}
+_in_flight = set()
+_state_lock = threading.Lock()
+
+def account_lock(key):
+    """
+    One lock per login so an account never runs two browser sessions at once.
+    """
+    with _state_lock:
+        return _account_locks.setdefault(key, threading.Lock())
+
+def claim_in_flight(jobs):
+    """
+    Marks jobs as being worked on by this process and returns the ones that
+    were not already taken, so no two workers touch the same publish_id.
+    """
+    with _state_lock:
+        claimed = [job for job in jobs if job['publish_id'] not in _in_flight]
+        _in_flight.update(job['publish_id'] for job in claimed)
+        return claimed
+
+def release_in_flight(jobs):
+    with _state_lock:
+        _in_flight.difference_update(job['publish_id'] for job in jobs)
 
-# Create a logger
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+def process_account(label, group, post_job, post_batch, on_result=None):
+    """
+    Posts all jobs of one login. Runs on a worker thread when WORKER_COUNT > 1.
+    on_result(job, success) defaults to report_result.
+    """
+    on_result = on_result or report_result
+    breaker = retry.get_breaker(label.lower())
 
-# Create handlers
-c_handler = logging.StreamHandler()
-# RotatingFileHandler: Max 1MB per file, keeps last 3 backup files (automation.log, automation.log.1, ...)
-f_handler = RotatingFileHandler('automation.log', maxBytes=1024*1024, backupCount=3, encoding='utf-8')
-c_handler.setLevel(logging.INFO)
-f_handler.setLevel(logging.INFO)
+    def should_stop():
+        # Shutting down, or the provider looks down: the claims of jobs not
+        # started yet are released and picked up later
+        return shutdown_event.is_set() or not breaker.allow()
 
-# Create formatters and add it to handlers
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-c_handler.setFormatter(formatter)
-f_handler.setFormatter(formatter)
+    if should_stop():
+        return
+    login_account_id = group[0]['login_account_id']
+    with account_lock(login_account_id), timing.job_context(provider=label.lower(), account_id=login_account_id):
+        group = claim_in_flight(group)
+        if not group:
+            return
+        try:
+            if BATCH_MODE:
+                logging.info(f"Processing {label} batch of {len(group)} jobs for account {login_account_id}")
+                # Checked before every post, so a SIGTERM or an opening
+                # breaker stops the batch between posts
+                post_batch(group, on_result, should_stop=should_stop)
+            else:
+                for job in group:
+                    if should_stop():
+                        break
+                    logging.info(f"Processing {label} Job: {job['publish_id']} ({job['title']})")
+                    with timing.job_context(publish_id=job['publish_id'], account_id=job['account_id']):
+                        success = post_job(job)
+                    on_result(job, success)
+        finally:
+            release_in_flight(group)
 
-# Add handlers to the logger
-if not logger.handlers:
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
+def ensure_pool_size():
+    """
+    Grows the driver pool so every worker thread can hold its own Chrome.
+    """
+    if WORKER_COUNT > 1:
+        pool = startup.import_module("browser").get_pool()
+        pool.max_size = max(pool.max_size, WORKER_COUNT)
 
+def claim_batch(label, provider_id):
+    """
+    Claims the provider's next due jobs and keeps their leases alive.
+    Nothing is claimed while the circuit breaker is open; a half-open breaker
+    gets a single probe job that decides whether the provider is back.
+    Returns (jobs, probing, drained); drained means a short (or no) batch,
+    so there is nothing more to claim for now.
+    """
+    database = startup.import_module("database")
+    breaker = retry.get_breaker(label.lower())
+    if not breaker.allow():
+        logging.warning(f"{label} circuit breaker open; retrying in {breaker.seconds_until_retry():.0f}s.")
+        return [], False, True
+    probing = breaker.state != "closed"
+    limit = 1 if probing else CLAIM_BATCH_SIZE
+    jobs = database.claim_jobs(provider_id, limit=limit)
+    logging.info(f"Claimed {len(jobs)} {label} jobs.")
+    if jobs and lease_renewer:
+        lease_renewer.add(job['publish_id'] for job in jobs)
+    return jobs, probing, len(jobs) < limit
+
+def finish_claims(jobs):
+    """
+    Hands claimed jobs back once posting them is over. Results are flushed
+    first, or posted jobs would look pending; anything still pending
+    (shutdown, crash mid-batch, stage errors) goes back to the queue.
+    """
+    if status_writer:
+        status_writer.flush()
+    publish_ids = [job['publish_id'] for job in jobs]
+    if lease_renewer:
+        lease_renewer.discard(publish_ids)
+    startup.import_module("database").release_claims(publish_ids)
+
+def process_jobs(label, jobs, post_job, post_batch):
+    """
+    Dispatches jobs grouped by login, either inline or across WORKER_COUNT
+    worker threads. Returns once every dispatched group has finished.
+    """
+    groups = group_jobs_by_login(jobs)
+    if WORKER_COUNT == 1:
+        for group in groups:
+            process_account(label, group, post_job, post_batch)
+        return
+
+    ensure_pool_size()
+
+    with ThreadPoolExecutor(max_workers=WORKER_COUNT, thread_name_prefix=f"{label}-worker") as executor:
+        futures = [
+            executor.submit(process_account, label, group, post_job, post_batch)
+            for group in groups
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"{label} Worker Error: {e}")
+
+def run_claimed_jobs(label, provider_id):
+    """
+    claim -> post -> update_job_status until the provider's queue is drained.
+    Claims are leased, so several nodes can run this against the same table.
+    Nothing is claimed while the provider's circuit breaker is open.
+    """
+    while not shutdown_event.is_set():
+        # A probe is posted before the next claim, so its result already
+        # decides whether the loop goes on
+        jobs, _, drained = claim_batch(label, provider_id)
+        if not jobs:
+            break
+        try:
+            # Images download in parallel before any browser is started
+            with timing.span("images.prefetch", provider=label.lower(), jobs=len(jobs)):
+                startup.import_module("images").prefetch_images(jobs)
+            post_job, post_batch = get_poster(provider_id)
+            process_jobs(label, jobs, post_job, post_batch)
+        finally:
+            finish_claims(jobs)
+        if drained:
+            break
+
+def run_pipeline(label, provider_id):
+    """
+    Staged version of run_claimed_jobs: claiming, image prefetch, rendering,
+    posting and status writes each run on their own threads, connected by
+    bounded queues (see pipeline.py). Browsers are handed jobs that are
+    already downloaded and rendered, and DB round trips happen off the
+    browser threads. Posting uses WORKER_COUNT browsers; the other stages
+    are sized with PIPELINE_<STAGE>_WORKERS / PIPELINE_<STAGE>_QUEUE.
+    """
+    images = startup.import_module("images")
+    post_job, post_batch = get_poster(provider_id)
+    render_job = get_renderer(provider_id)
+    claimed = []
+    ensure_pool_size()
+
+    def claim(emit):
+        while not shutdown_event.is_set():
+            jobs, probing, drained = claim_batch(label, provider_id)
+            with _state_lock:
+                claimed.extend(jobs)
+            # Blocks while the image stage is full
+            for group in group_jobs_by_login(jobs):
+                emit(group)
+            # The probe's result arrives later, on the post stage; stop here
+            # and let the next cycle claim according to it
+            if probing or drained:
+                return
+
+    def prefetch(group):
+        images.prefetch_images(group)
+        return group
+
+    def render(group):
+        for job in group:
+            render_job(job)
+        return group
+
+    def post(group):
+        # Results go straight to the status stage, one job at a time
+        process_account(label, group, post_job, post_batch, on_result=lambda job, success: status.input.put(
+            (job, *classify_result(job, success))
+        ))
+
+    def write(result):
+        job, status_id, fail_reason, transient = result
+        write_result(job, status_id, fail_reason, transient)
+
+    status = pipeline.Stage("status", write)
+    stages = [
+        pipeline.Stage("images", prefetch, workers=pipeline.stage_setting("images", "WORKERS", 2)),
+        pipeline.Stage("render", render),
+        pipeline.Stage("post", post, workers=WORKER_COUNT),
+        status,
+    ]
+    try:
+        pipeline.Pipeline(claim, stages, source_workers=pipeline.stage_setting("claim", "WORKERS", 1)).run()
+    finally:
+        finish_claims(claimed)
 
 def run_naver_automation():
-    load_dotenv()
-    PROVIDER_NAVER = 19
     logging.info("--- Starting Naver Automation Cycle ---")
     try:
-        naver_jobs = database.get_scheduled_jobs(PROVIDER_NAVER)
-        logging.info(f"Found {len(naver_jobs)} Naver jobs.")
-        for job in naver_jobs:
-            logging.info(f"Processing Naver Job: {job['publish_id']} ({job['title']})")
-            success = naver.poster.post_naver(job)
-            status_id = 3 if success else 2
-            fail_reason = None if success else "Automation Script Failed"
-            database.update_job_status(job['publish_id'], status_id, fail_reason)
-            time.sleep(5)
+        (run_pipeline if PIPELINE_MODE else run_claimed_jobs)("Naver", PROVIDER_NAVER)
     except Exception as e:
         logging.error(f"Naver Loop Error: {e}")
+    finally:
+        # Warm drivers stay pooled between jobs; drop the ones that went stale.
+        reap_idle_drivers()
+        timing.write_prometheus_textfile()
     logging.info("--- Naver Cycle Completed ---")
 
 def run_tistory_automation():
-    load_dotenv()
-    PROVIDER_TISTORY = 8
     logging.info("--- Starting Tistory Automation Cycle ---")
     try:
-        tistory_jobs = database.get_scheduled_jobs(PROVIDER_TISTORY)
-        logging.info(f"Found {len(tistory_jobs)} Tistory jobs.")
-        for job in tistory_jobs:
-            logging.info(f"Processing Tistory Job: {job['publish_id']} ({job['title']})")
-            success = tistory.poster.post_tistory(job)
-            status_id = 3 if success else 2
-            fail_reason = None if success else "Automation Script Failed"
-            database.update_job_status(job['publish_id'], status_id, fail_reason)
-            time.sleep(5)
+        (run_pipeline if PIPELINE_MODE else run_claimed_jobs)("Tistory", PROVIDER_TISTORY)
     except Exception as e:
         logging.error(f"Tistory Loop Error: {e}")
+    finally:
+        # Warm drivers stay pooled between jobs; drop the ones that went stale.
+        reap_idle_drivers()
+        timing.write_prometheus_textfile()
     logging.info("--- Tistory Cycle Completed ---")
 
-if __name__ == "__main__":
+def reap_idle_drivers():
+    browser = startup.loaded("browser")
+    if browser:
+        browser.get_pool().reap_idle()
+
+def request_shutdown(signum, frame):
+    if not shutdown_event.is_set():
+        logging.info(f"Received signal {signum}. Finishing in-flight posts before exit...")
+        shutdown_event.set()
+
+def run_slot_scheduler():
+    import pytz
     KST = pytz.timezone('Asia/Seoul')
-    logging.info("Worker Started. Scheduled Mode: Naver(00,30m), Tistory(15,45m)")
-    
     last_run_minute = -1
     
-    while True:
+    while not shutdown_event.is_set():
         now = datetime.now(KST)
         current_minute = now.minute
         
@@ -92,4 +393,43 @@ if __name__ == "__main__":
                 last_run_minute = current_minute
                 
         # Check every 30 seconds to be precise but not too frequent
-        time.sleep(30)
+        shutdown_event.wait(30)
+
+if __name__ == "__main__":
+    if "--import-profile" in sys.argv:
+        # Startup cost so far, then what each lazily imported module adds
+        print(startup.import_profile(
+            ["database", "scheduler", "images", "browser"] + [module for module, _, _ in POSTERS.values()]
+        ))
+        sys.exit(0)
+
+    if SCHEDULER_MODE == "slots":
+        logging.info(f"Worker Started. Scheduled Mode: Naver(00,30m), Tistory(15,45m), Workers: {WORKER_COUNT}")
+    else:
+        logging.info(f"Worker Started. Event Mode: posting as jobs come due, Workers: {WORKER_COUNT}")
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    status_writer = startup.import_module("database").StatusWriter()
+    lease_renewer = startup.import_module("database").LeaseRenewer()
+    timing.start_prometheus_server()
+    logging.info(f"Worker ready in {startup.elapsed() * 1000:.0f} ms.")
+
+    try:
+        if SCHEDULER_MODE == "slots":
+            run_slot_scheduler()
+        else:
+            startup.import_module("scheduler").run_event_scheduler({
+                PROVIDER_NAVER: run_naver_automation,
+                PROVIDER_TISTORY: run_tistory_automation,
+            }, shutdown_event, breakers={
+                PROVIDER_NAVER: retry.get_breaker("naver"),
+                PROVIDER_TISTORY: retry.get_breaker("tistory"),
+            })
+    finally:
+        lease_renewer.close()
+        status_writer.close()
+        browser = startup.loaded("browser")
+        if browser:
+            browser.shutdown_pool()
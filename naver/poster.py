@@ -1,21 +1,40 @@
 
+import logging
 import time
+import json
+import uuid
 import random
 import os
+from urllib.parse import urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 
 # Create __init__.py in this folder if needed
 try:
-    from browser import get_driver
+    from browser import checkout_driver, checkin_driver
 except ImportError:
     # Fallback for relative import if run as package
     import sys
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from browser import get_driver
+    from browser import checkout_driver, checkin_driver
+import artifacts
+import ratelimit
+import retry
+import session_store
+import timing
+from waits import wait_for, wait_until, wait_gone, min_count
+
+# NAVER_HTTP_MODE=true: publish with plain HTTP requests using the saved login
+# cookies; the SmartEditor browser flow stays as the fallback.
+NAVER_HTTP_MODE = os.getenv("NAVER_HTTP_MODE", "false").lower() == "true"
+NAVER_HTTP_WRITE_URL = os.getenv("NAVER_HTTP_WRITE_URL", "https://blog.naver.com/RabbitWrite.naver")
+
+# Site URLs; bench/ points these at its local mock pages
+NAVER_HOME_URL = os.getenv("NAVER_HOME_URL", "https://www.naver.com")
+NAVER_LOGIN_URL = os.getenv("NAVER_LOGIN_URL", "https://nid.naver.com/nidlogin.login")
+NAVER_BLOG_URL = os.getenv("NAVER_BLOG_URL", "https://blog.naver.com")
+NAVER_HTTP_TIMEOUT = float(os.getenv("NAVER_HTTP_TIMEOUT", "30"))
 
 def input_key_value(driver, element, value):
     """
@@ -28,49 +47,130 @@ def input_key_value(driver, element, value):
         arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
     """, element)
 
-def login_naver(driver, naver_id, naver_pw):
+def normalize_text(text):
+    return " ".join((text or "").split())
+
+def get_editor_body_text(driver):
+    return driver.execute_script("""
+        var root = document.querySelector('.se-main-container') || document.querySelector('.se-content');
+        return root ? root.innerText : '';
+    """)
+
+def insert_content_bulk(driver, content, before=None):
+    """
+    Puts the whole body into SmartEditor in one operation instead of one
+    keystroke per character: first as a synthetic clipboard paste into the
+    focused editor, then via execCommand('insertText').
+    before: editor text captured before inserting (title, placeholders).
+    Returns 'ok' when the editor holds the text, 'partial' when the editor
+    changed but doesn't hold it, and 'empty' when nothing was inserted.
+    """
+    expected = normalize_text(content)
+    if before is None:
+        before = get_editor_body_text(driver)
+    before = normalize_text(before)
+    attempts = (
+        """
+        var dt = new DataTransfer();
+        dt.setData('text/plain', arguments[0]);
+        var target = document.activeElement || document.body;
+        target.dispatchEvent(new ClipboardEvent('paste', {
+            clipboardData: dt, bubbles: true, cancelable: true
+        }));
+        """,
+        "document.execCommand('insertText', false, arguments[0]);",
+    )
+    for script in attempts:
+        driver.execute_script(script, content)
+        body = normalize_text(get_editor_body_text(driver))
+        if body == before:
+            continue
+        return "ok" if expected in body else "partial"
+    return "empty"
+
+def content_landed(driver, content, before):
+    """
+    True if the editor changed since `before` and now holds the content.
+    """
+    body = normalize_text(get_editor_body_text(driver))
+    return body != normalize_text(before) and normalize_text(content) in body
+
+def upload_images(driver, image_paths):
+    """
+    Uploads prefetched local image files through SmartEditor's file input,
+    so the editor doesn't have to fetch remote URLs itself.
+    """
+    file_inputs = driver.find_elements(By.CSS_SELECTOR, "input[type='file']")
+    if not file_inputs:
+        logging.warning("No SmartEditor file input found, skipping image upload.")
+        return False
+
+    before = len(driver.find_elements(By.CSS_SELECTOR, ".se-image-resource"))
+    file_inputs[0].send_keys("\n".join(os.path.abspath(p) for p in image_paths))
+    if wait_until(driver, min_count(".se-image-resource", before + len(image_paths))):
+        logging.info(f"Uploaded {len(image_paths)} images.")
+        return True
+    logging.warning("Image upload did not complete in time.")
+    return False
+
+def is_naver_logged_in(driver):
+    """
+    Cheap login check: the naver.com header shows a logout button.
+    """
+    return bool(wait_until(driver, "naver_logged_in"))
+
+@timing.timed("naver.login")
+def login_naver(driver, naver_id, naver_pw, account_id=None):
     """
     Performs automated login to Naver with stealth and cookie support.
+    A saved session for account_id is tried first; the full login flow only
+    runs when that session is missing or dead.
     """
-    print("Checking login status at naver.com...")
+    logging.info("Checking login status at naver.com...")
     try:
-        driver.get("https://www.naver.com")
-        time.sleep(random.uniform(2, 4))
+        # 1. Try the saved session for this account
+        if session_store.restore_session(driver, "naver", account_id):
+            driver.get(NAVER_HOME_URL)
+            if is_naver_logged_in(driver):
+                logging.info("Restored saved session, already logged in.")
+                return True
+            logging.warning("Saved session is no longer valid, falling back to login.")
+            session_store.discard_session("naver", account_id)
+        else:
+            driver.get(NAVER_HOME_URL)
+            wait_until(driver, "page_loaded")
         
-        # 1. Try Cookie Login if NAVER_COOKIES env var exists
+        # 2. Try Cookie Login if NAVER_COOKIES env var exists
         # Format: [{"name": "...", "value": "...", "domain": ".naver.com", ...}, ...]
         env_cookies = os.getenv("NAVER_COOKIES")
         if env_cookies:
             try:
-                print("Found NAVER_COOKIES in env. Attempting injection...")
+                logging.info("Found NAVER_COOKIES in env. Attempting injection...")
                 cookies = json.loads(env_cookies)
                 for cookie in cookies:
                     driver.add_cookie(cookie)
-                driver.get("https://www.naver.com")
-                time.sleep(2)
+                driver.get(NAVER_HOME_URL)
+                wait_until(driver, "page_loaded")
             except Exception as ce:
-                print(f"Cookie injection failed: {ce}")
+                logging.error(f"Cookie injection failed: {ce}")
 
         # Check login state
-        logout_btn = driver.find_elements(By.CSS_SELECTOR, "button.btn_logout, a.btn_logout")
-        if logout_btn and any(b.is_displayed() for b in logout_btn):
-             print("Already logged in.")
+        if is_naver_logged_in(driver):
+             logging.info("Already logged in.")
+             session_store.save_session(driver, "naver", account_id)
              return True
 
     except Exception as e:
-        print(f"Error checking login status: {e}")
+        logging.error(f"Error checking login status: {e}")
 
-    print(f"Navigating to Naver Login Page... (Using Account: {naver_id} / PW: {naver_pw})")
-    driver.get("https://nid.naver.com/nidlogin.login")
-    time.sleep(random.uniform(3, 5))
+    logging.info(f"Navigating to Naver Login Page... (Using Account: {naver_id})")
+    driver.get(NAVER_LOGIN_URL)
     
     try:
-        id_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "id"))
-        )
+        id_input = wait_for(driver, "naver_login_form")
         pw_input = driver.find_element(By.ID, "pw")
         
-        print(f"Inputting Credentials for {naver_id}...")
+        logging.info(f"Inputting Credentials for {naver_id}...")
         # Use JS for both to bypass typing issues and caps lock
         input_key_value(driver, id_input, naver_id)
         time.sleep(random.uniform(1, 2))
@@ -79,40 +179,38 @@ def login_naver(driver, naver_id, naver_pw):
         
         login_btn = driver.find_element(By.ID, "log.login")
         login_btn.click()
-        time.sleep(random.uniform(4, 6))
+        wait_until(driver, "naver_login_submitted")
         
         if "captcha" in driver.page_source or "자동입력 방지" in driver.page_source or "g-recaptcha" in driver.page_source:
-             print("CRITICAL: Captcha detected.")
-             driver.save_screenshot("debug_naver_captcha.png")
+             logging.error("CRITICAL: Captcha detected.")
+             retry.note_failure("captcha")
+             artifacts.capture(driver, "login_captcha")
              return False
              
         # Verification
-        driver.get("https://www.naver.com")
-        time.sleep(3)
+        driver.get(NAVER_HOME_URL)
+        wait_until(driver, "naver_logged_in")
         if "logout" in driver.page_source or "로그아웃" in driver.page_source:
-            print("Naver Login Successful.")
+            logging.info("Naver Login Successful.")
+            session_store.save_session(driver, "naver", account_id)
             return True
             
-        print("Naver Login Failed: Could not verify login state.")
+        logging.warning("Naver Login Failed: Could not verify login state.")
+        retry.note_failure("login_failed", "could not verify login state")
         return False
         
     except Exception as e:
-        print(f"Login Exception: {e}")
+        logging.error(f"Login Exception: {e}")
+        retry.note_exception(e)
         return False
 
-def post_naver(job_data):
+def write_naver_post(driver, job_data):
     """
-    Executes the Naver posting job.
-    job_data: { 'blog_id', 'blog_pw', 'category_no', 'title', 'content', ... }
+    Opens the write page on an already logged-in driver and publishes one post.
+    job_data: { 'blog_id', 'category_no', 'title', 'content', 'blog_url', ... }
     """
     blog_id = job_data['blog_id']
-    # Use global Naver ID/PW if not in job_data (for main account) or job_data specific?
-    # Usually platform_accounts has the ID/PW.
-    # User said: "platform_accounts see blog_url/blog_id/blog_pw ..." -> So use job_data.
-    
-    # Note: 'blog_id' in platform_accounts might be the Naver ID for login.
-    naver_id = job_data['blog_id']
-    naver_pw = job_data['blog_pw']
+    ratelimit.wait_turn("naver", job_data.get('login_account_id'))
     
     category_no = job_data['category_no']
     title = f"Post: {time.strftime('%Y-%m-%d %H:%M')}" # Temporary if title missing? 
@@ -137,56 +235,55 @@ def post_naver(job_data):
     # For this file, I will accept `title` in job_data.
     title = job_data.get('title', "New Blog Post") 
     content = job_data.get('content', "")
+    phases = timing.Phases("naver")
+    retry.clear_failure()
 
-    print(f"Starting Naver Post for {blog_id}...")
-    driver = None
     try:
-        driver = get_driver()
-        
-        if not login_naver(driver, naver_id, naver_pw):
-            raise Exception("Login Failed")
+        phases.start("editor_load")
+        # Previous post in the same session may have left us inside mainFrame
+        driver.switch_to.default_content()
 
         blog_url = job_data.get('blog_url')
         if blog_url:
             target_url = f"{blog_url.rstrip('/')}?Redirect=Write"
         else:
-            target_url = f"https://blog.naver.com/{blog_id}?Redirect=Write"
+            target_url = f"{NAVER_BLOG_URL}/{blog_id}?Redirect=Write"
         if category_no:
             target_url += f"&categoryNo={category_no}"
             
-        print(f"Navigating to Write Page: {target_url}")
+        logging.info(f"Navigating to Write Page: {target_url}")
         driver.get(target_url)
-        time.sleep(random.uniform(5, 8))
+        wait_until(driver, "naver_editor_frame")
         
         # Frame Switch: Naver Smart Editor One is usually in 'mainFrame'
         try:
             driver.switch_to.frame("mainFrame")
-            print("Switched to mainFrame")
+            logging.info("Switched to mainFrame")
         except:
-            print("No mainFrame found, assuming top-level.")
+            logging.warning("No mainFrame found, assuming top-level.")
 
         # 1. Handle "Draft Saved" Popup (User reported blocker)
         # <strong class="se-popup-title">작성 중인 글이 있습니다.</strong>
         # Cancel button: <button type="button" class="se-popup-button se-popup-button-cancel">
         try:
-            time.sleep(2)
+            # The draft popup renders together with the editor
+            wait_until(driver, "naver_editor_ready")
             # Check for popup cancel button presence
             draft_cancel_btns = driver.find_elements(By.CSS_SELECTOR, ".se-popup-button-cancel")
             for btn in draft_cancel_btns:
                 if btn.is_displayed():
                     btn.click()
-                    print("Closed 'Draft Saved' popup.")
-                    time.sleep(1)
+                    logging.info("Closed 'Draft Saved' popup.")
+                    wait_gone(driver, btn)
         except:
             pass
 
         # 2. Handle Help/Guide Popups & Native Alerts
         try:
-            time.sleep(1)
             # Dismiss native alerts if any
             try:
                 alert = driver.switch_to.alert
-                print(f"Native Alert detected: {alert.text}")
+                logging.info(f"Native Alert detected: {alert.text}")
                 alert.dismiss()
             except:
                 pass
@@ -197,63 +294,72 @@ def post_naver(job_data):
             for btn in close_btns:
                 if btn.is_displayed():
                     btn.click()
-                    print("Closed help/popup panel.")
-                    time.sleep(1)
+                    logging.info("Closed help/popup panel.")
+                    wait_gone(driver, btn)
         except:
             pass
             
         # Title Input
-        print("Attempting to write title...")
+        phases.start("title_input")
+        logging.info("Attempting to write title...")
         try: 
             # Smart Editor One Title Selectors
-            title_input = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, ".se-documentTitle, .se-ff-tit, .se-title-text, .se-text-paragraph-align-center"))
-            )
+            title_input = wait_for(driver, "naver_editor_ready")
             title_input.click()
             time.sleep(1.5) # Increased delay for stability
             ActionChains(driver).send_keys(title).perform()
         except Exception as e: 
-            print(f"Title input issue: {e}")
+            logging.warning(f"Title input issue: {e}")
 
         # Content Input
-        print("Attempting to write content...")
+        phases.start("content_input")
+        logging.info("Attempting to write content...")
         try:
             # Smart Editor One Content Body
             content_area = driver.find_element(By.CSS_SELECTOR, ".se-main-container .se-text-paragraph, .se-component-content, .se-content")
             content_area.click()
             time.sleep(1.5)
-            ActionChains(driver).send_keys(content).perform()
+            before = get_editor_body_text(driver)
+            result = insert_content_bulk(driver, content, before)
+            if result == "empty":
+                logging.warning("Bulk paste not accepted, falling back to keystrokes.")
+                ActionChains(driver).send_keys(content).perform()
+                result = "ok" if content_landed(driver, content, before) else "partial"
         except Exception as e:
-            print(f"Content input issue: {e}")
+            logging.error(f"Content input failed: {e}")
+            retry.note_exception(e)
+            artifacts.capture(driver, "content_input")
+            return False
+        if result != "ok":
+            # Publishing now would put a wrong or empty body online
+            logging.error("Editor text does not match the content; not publishing.")
+            retry.note_failure("content_mismatch", "editor body differs from content")
+            artifacts.capture(driver, "content_mismatch")
+            return False
+        logging.info("Entered Content.")
+
+        # Images (downloaded ahead of time by images.prefetch_images)
+        image_paths = [p for p in job_data.get('image_paths') or [] if p]
+        if image_paths:
+            phases.start("image_upload")
+            try:
+                upload_images(driver, image_paths)
+            except Exception as e:
+                logging.warning(f"Image upload issue: {e}")
             
         # 7. Publish (Robust Retry Logic)
+        phases.start("publish")
         try:
-            print("Key step: Publishing...")
+            logging.info("Key step: Publishing...")
             
             # Step 1: Click 'Publish' Button (Top Right)
             found_publish = False
-            for attempt in range(3): # Try 3 times
-                try:
-                    candidates = [
-                        "button[data-click-area='tpb.publish']",
-                        "button[class*='publish_btn']",
-                        ".btn_publish"
-                    ]
-                    for selector in candidates:
-                        publish_btns = driver.find_elements(By.CSS_SELECTOR, selector)
-                        for btn in publish_btns:
-                            if btn.is_displayed():
-                                # JS Click is more reliable in some headless scenarios
-                                driver.execute_script("arguments[0].click();", btn)
-                                found_publish = True
-                                print(f"Clicked primary Publish button ({selector}) on attempt {attempt+1}.")
-                                break
-                        if found_publish: break
-                except:
-                    pass
-                
-                if found_publish: break
-                time.sleep(2)
+            btn = wait_until(driver, "naver_publish_button")
+            if btn:
+                # JS Click is more reliable in some headless scenarios
+                driver.execute_script("arguments[0].click();", btn)
+                found_publish = True
+                logging.info("Clicked primary Publish button.")
 
             if not found_publish:
                 # Last resort XPath
@@ -261,23 +367,20 @@ def post_naver(job_data):
                     btn = driver.find_element(By.XPATH, "//button[contains(., '발행')]")
                     driver.execute_script("arguments[0].click();", btn)
                     found_publish = True
-                    print("Clicked primary Publish button (XPath).")
+                    logging.info("Clicked primary Publish button (XPath).")
                 except:
                     pass
 
-            print("Waiting for Publish Layer to open...")
-            time.sleep(2) 
+            logging.info("Waiting for Publish Layer to open...")
             
             # Step 2: Click 'Confirm' Button (In the layer)
             # Target: <button ... class="confirm_btn__WEaBq" data-testid="seOnePublishBtn" data-click-area="tpb*i.publish">
-            print("Attempting to click Final Publish button...")
+            logging.info("Attempting to click Final Publish button...")
             
             final_clicked = False
             try:
-                layer_container = WebDriverWait(driver, 5).until(
-                    EC.visibility_of_element_located((By.CSS_SELECTOR, "div[class*='layer_publish']"))
-                )
-                print("Publish Layer detected!")
+                layer_container = wait_for(driver, "naver_publish_layer_open")
+                logging.info("Publish Layer detected!")
                 
                 candidates = [
                     "button[data-testid='seOnePublishBtn']",       # Best: explicit test ID
@@ -292,7 +395,7 @@ def post_naver(job_data):
                         btn = layer_container.find_element(By.CSS_SELECTOR, candidate)
                         if btn.is_displayed():
                             target_btn = btn
-                            print(f"Found final button via selector: {candidate}")
+                            logging.info(f"Found final button via selector: {candidate}")
                             break
                     except:
                         pass
@@ -300,7 +403,7 @@ def post_naver(job_data):
                 if not target_btn:
                     try:
                         target_btn = layer_container.find_element(By.XPATH, ".//button[contains(., '발행')]")
-                        print("Found final button via inner text (scoped).")
+                        logging.info("Found final button via inner text (scoped).")
                     except:
                         pass
                 
@@ -309,37 +412,321 @@ def post_naver(job_data):
                     time.sleep(0.5)
                     driver.execute_script("arguments[0].click();", target_btn)
                     final_clicked = True
-                    print("Executed JS Click on Final Button.")
+                    logging.info("Executed JS Click on Final Button.")
                 else:
-                    print("Could not find any suitable button inside the layer.")
+                    logging.warning("Could not find any suitable button inside the layer.")
 
             except Exception as e:
-                print(f"Final publish logic scoped failed: {e}")
+                logging.error(f"Final publish logic scoped failed: {e}")
+                # A layer that never opened is a timeout, not a changed page
+                retry.note_exception(e)
                 
             if final_clicked:
-                print("Processed Final Click!")
-                time.sleep(10)
-                driver.save_screenshot("3_published_success.png")
+                logging.info("Processed Final Click!")
+                # The layer can hide before the save request finishes; only
+                # the navigation to the new post proves it went through.
+                driver.switch_to.default_content()
+                if not wait_until(driver, "naver_post_published"):
+                    logging.error(f"Post view never loaded after publishing (at {driver.current_url}).")
+                    retry.note_failure("not_published", "no post view after publish")
+                    artifacts.capture(driver, "not_published")
+                    return False
+                logging.info(f"Published successfully: {driver.current_url}")
+                artifacts.capture(driver, "published", success=True)
                 return True
             else:
-                print("Failed to click Final Publish Button.")
-                driver.save_screenshot("debug_publish_layer.png")
+                logging.error("Failed to click Final Publish Button.")
+                retry.note_failure("selector_missing", "final publish button", override=False)
+                artifacts.capture(driver, "publish_layer")
                 return False
 
         except Exception as e:
-            print(f"Publish logic failed: {e}")
+            logging.error(f"Publish logic failed: {e}")
+            retry.note_exception(e)
             if driver:
-                driver.save_screenshot("debug_publish_exception.png")
+                artifacts.capture(driver, "publish_exception")
             return False
 
     except Exception as e:
-        print(f"Naver Error: {e}")
+        logging.error(f"Naver Error: {e}")
+        retry.note_exception(e)
+        artifacts.capture(driver, "error")
+        return False
+    finally:
+        phases.close()
+
+def get_naver_blog_id(job_data):
+    """
+    The blog id used in URLs: first path segment of blog_url, else the login id.
+    """
+    blog_url = job_data.get('blog_url')
+    if blog_url:
+        path = urlparse(blog_url if "//" in blog_url else f"https://{blog_url}").path.strip('/')
+        if path:
+            return path.split('/')[0]
+    return job_data['blog_id']
+
+def _se_id():
+    return f"SE-{uuid.uuid4()}"
+
+def _se_paragraph(text):
+    return {
+        "id": _se_id(),
+        "nodes": [{"id": _se_id(), "value": text, "@ctype": "textNode"}],
+        "@ctype": "paragraph",
+    }
+
+def build_naver_document(title, content):
+    """
+    Builds the SmartEditor ONE document model: a title component followed by
+    one text component with a paragraph per content line.
+    """
+    lines = (content or "").split('\n')
+    return {
+        "documentId": "",
+        "document": {
+            "version": "2.8.0",
+            "theme": "default",
+            "language": "ko-KR",
+            "id": str(uuid.uuid4()),
+            "components": [
+                {
+                    "id": _se_id(),
+                    "layout": "default",
+                    "title": [_se_paragraph(title)],
+                    "subTitle": None,
+                    "align": "left",
+                    "@ctype": "documentTitle",
+                },
+                {
+                    "id": _se_id(),
+                    "layout": "default",
+                    "value": [_se_paragraph(line) for line in lines],
+                    "@ctype": "text",
+                },
+            ],
+        },
+    }
+
+def render_job(job_data):
+    """
+    Builds the HTTP document model ahead of time (pipeline render stage).
+    The browser flow pastes the raw text and needs nothing rendered.
+    """
+    if NAVER_HTTP_MODE:
+        job_data['rendered_document'] = json.dumps(build_naver_document(
+            job_data.get('title', "New Blog Post"), job_data.get('content', "")
+        ), ensure_ascii=False)
+    return job_data
+
+def build_naver_population_params(category_no):
+    return {
+        "configuration": {
+            "openType": 2,              # 2 = public (전체공개)
+            "commentYn": True,
+            "searchYn": True,
+            "sympathyYn": True,
+            "scrapType": 2,
+            "outSideAllowYn": True,
+        },
+        "populationMeta": {
+            "categoryId": int(category_no) if category_no else 0,
+            "logNo": None,
+            "directorySeq": 0,
+            "directoryDetail": None,
+            "mrBlogTalkCode": None,
+            "postWriteTimeType": "now",
+            "tags": "",
+            "moviePanelParticipation": False,
+            "greenReviewBannerYn": False,
+            "continueSaved": False,
+            "noticePostYn": False,
+            "autoByCategoryYn": False,
+            "postLocationSupportYn": False,
+            "postLocationJson": None,
+            "prePostDate": None,
+            "thisDayPostInfo": None,
+            "scrapYn": False,
+        },
+        "editorSource": "",
+    }
+
+@timing.timed("naver.http_post")
+def post_naver_http(job_data):
+    """
+    Publishes one post without a browser, reusing the saved login cookies.
+    Returns True/False for the publish result, or None when the job needs
+    the browser (no usable session, or images to upload).
+    """
+    if any(job_data.get('image_paths') or []):
+        # Image upload goes through SmartEditor's uploader, which needs the browser
+        return None
+    retry.clear_failure()
+
+    account_id = job_data.get('login_account_id')
+    http = session_store.get_http_session("naver", account_id)
+    if http is None:
+        return None
+
+    blog_id = get_naver_blog_id(job_data)
+    ratelimit.wait_turn("naver", account_id)
+    logging.info(f"Posting to Naver blog {blog_id} over HTTP...")
+    try:
+        response = http.post(
+            NAVER_HTTP_WRITE_URL,
+            data={
+                "blogId": blog_id,
+                "documentModel": job_data.get('rendered_document') or json.dumps(build_naver_document(
+                    job_data.get('title', "New Blog Post"), job_data.get('content', "")
+                ), ensure_ascii=False),
+                "populationParams": json.dumps(build_naver_population_params(job_data.get('category_no'))),
+                "productApiVersion": "v1",
+            },
+            headers={
+                "Referer": f"{NAVER_BLOG_URL}/{blog_id}/postwrite",
+                "Accept": "application/json, text/plain, */*",
+            },
+            timeout=NAVER_HTTP_TIMEOUT,
+            allow_redirects=False,
+        )
+    except Exception as e:
+        logging.error(f"Naver HTTP post failed: {e}")
+        retry.note_exception(e)
+        return False
+
+    # Logged out: Naver redirects to nid.naver.com or answers 401/403
+    if response.status_code in (401, 403) or (
+        300 <= response.status_code < 400 and urlparse(NAVER_LOGIN_URL).hostname in response.headers.get("Location", "")
+    ):
+        logging.warning("Saved Naver session rejected, falling back to browser login.")
+        session_store.drop_http_session("naver", account_id)
+        return None
+
+    if response.status_code != 200:
+        logging.error(f"Naver HTTP post failed: {response.status_code} {response.text[:200]}")
+        retry.note_failure("server_error" if response.status_code >= 500 else "rejected", f"HTTP {response.status_code}")
+        return False
+
+    try:
+        data = response.json()
+    except ValueError:
+        data = {}
+    if data.get("isSuccess"):
+        logging.info(f"Published successfully over HTTP: {data.get('result', {}).get('redirectUrl')}")
+        return True
+    logging.warning(f"Naver HTTP post was not accepted: {response.text[:200]}")
+    retry.note_failure("rejected", response.text[:200])
+    return False
+
+def post_naver(job_data):
+    """
+    Executes the Naver posting job.
+    job_data: { 'blog_id', 'blog_pw', 'category_no', 'title', 'content', ... }
+    """
+    blog_id = job_data['blog_id']
+    # Use global Naver ID/PW if not in job_data (for main account) or job_data specific?
+    # Usually platform_accounts has the ID/PW.
+    # User said: "platform_accounts see blog_url/blog_id/blog_pw ..." -> So use job_data.
+    
+    # Note: 'blog_id' in platform_accounts might be the Naver ID for login.
+    naver_id = job_data['blog_id']
+    naver_pw = job_data['blog_pw']
+
+    if NAVER_HTTP_MODE:
+        result = post_naver_http(job_data)
+        if result is not None:
+            return result
+
+    logging.info(f"Starting Naver Post for {blog_id}...")
+    retry.clear_failure()
+    driver = None
+    try:
+        with timing.span("naver.driver_checkout"):
+            driver = checkout_driver("naver")
+        
+        if not login_naver(driver, naver_id, naver_pw, job_data.get('login_account_id')):
+            raise Exception("Login Failed")
+
+        return write_naver_post(driver, job_data)
+
+    except Exception as e:
+        logging.error(f"Naver Error: {e}")
+        retry.note_exception(e)
         if driver:
-            driver.save_screenshot("debug_naver_error.png")
+            artifacts.capture(driver, "error")
         return False
     finally:
         if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+            # Hand the browser back to the pool instead of quitting it;
+            # the pool resets or discards it.
+            checkin_driver(driver)
+
+def post_naver_batch(jobs, on_result, should_stop=None):
+    """
+    Publishes several posts that share one Naver login in a single browser
+    session: login once, then write each post back-to-back.
+    on_result(job, success) is called once per job, in order.
+    should_stop() is checked before each post; once it returns True no new
+    post is started and the rest of the jobs are left unreported (pending).
+    The same happens when the browser crashes: the rest wait for a fresh
+    driver instead of each failing against the dead one.
+    """
+    should_stop = should_stop or (lambda: False)
+    if NAVER_HTTP_MODE:
+        browser_jobs = []
+        for job in jobs:
+            if should_stop():
+                return
+            with timing.job_context(publish_id=job['publish_id'], account_id=job['account_id']):
+                result = post_naver_http(job)
+            if result is None:
+                browser_jobs.append(job)
+            else:
+                on_result(job, result)
+        jobs = browser_jobs
+
+    if not jobs or should_stop():
+        return
+    first = jobs[0]
+    logging.info(f"Starting Naver batch of {len(jobs)} posts for {first['blog_id']}...")
+
+    retry.clear_failure()
+    driver = None
+    crashed = False
+    remaining = list(jobs)
+    try:
+        with timing.span("naver.driver_checkout"):
+            driver = checkout_driver("naver")
+
+        if not login_naver(driver, first['blog_id'], first['blog_pw'], first.get('login_account_id')):
+            raise Exception("Login Failed")
+
+        while remaining:
+            if should_stop():
+                logging.info(f"Stopping batch, {len(remaining)} posts left for other workers.")
+                return
+            job = remaining.pop(0)
+            logging.info(f"Batch post {job['publish_id']} ({len(jobs) - len(remaining)}/{len(jobs)})")
+            with timing.job_context(publish_id=job['publish_id'], account_id=job['account_id']):
+                success = write_naver_post(driver, job)
+            on_result(job, success)
+            if not success and retry.last_failure()[0] == "driver_crash":
+                logging.warning(f"Browser crashed, stopping batch; {len(remaining)} posts left pending.")
+                crashed = True
+                return
+
+    except Exception as e:
+        logging.error(f"Naver Batch Error: {e}")
+        retry.note_exception(e)
+        if retry.last_failure()[0] == "driver_crash":
+            # One crash, not a failure per job; the jobs are released and retried
+            crashed = True
+            return
+        if driver:
+            artifacts.capture(driver, "error")
+        # Every job left in the batch fails for the same reason
+        for job in remaining:
+            on_result(job, False)
+    finally:
+        if driver:
+            checkin_driver(driver, discard=crashed)
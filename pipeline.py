@@ -0,0 +1,103 @@
+import os
+import queue
+import logging
+import threading
+
+import timing
+
+# Marks the end of a stage's input; each worker puts it back for its siblings.
+_DONE = object()
+
+def stage_setting(stage, name, default):
+    """
+    PIPELINE_<STAGE>_<NAME>, e.g. PIPELINE_IMAGES_WORKERS=4.
+    """
+    return max(1, int(os.getenv(f"PIPELINE_{stage.upper()}_{name}", str(default))))
+
+class Stage:
+    """
+    One pipeline stage: `workers` threads take items from a bounded input
+    queue, call fn(item) and pass on whatever it returns (None drops the
+    item). A full output queue blocks the stage, so a slow stage holds back
+    the ones feeding it instead of letting work pile up.
+    """
+
+    def __init__(self, name, fn, workers=None, queue_size=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers or stage_setting(name, "WORKERS", 1)
+        self.input = queue.Queue(maxsize=queue_size or stage_setting(name, "QUEUE", self.workers * 2))
+        self.output = None
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def finish(self):
+        """
+        Lets the workers drain what is queued, then waits for them to exit.
+        """
+        self.input.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            item = self.input.get()
+            if item is _DONE:
+                self.input.put(_DONE)
+                return
+            try:
+                with timing.span(f"pipeline.{self.name}"):
+                    result = self.fn(item)
+            except Exception as e:
+                # The item's jobs stay claimed and are released when the run ends
+                logging.error(f"Pipeline stage {self.name} error: {e}")
+                continue
+            if result is not None and self.output is not None:
+                self.output.put(result)
+
+class Pipeline:
+    """
+    Runs a source and a chain of stages connected by bounded queues.
+
+    source(emit) produces the work: it calls emit(item) for each item (which
+    blocks while the first stage is full) and returns when there is no more.
+    It runs on `source_workers` threads. run() returns once every item has
+    gone through the last stage.
+    """
+
+    def __init__(self, source, stages, source_workers=1):
+        self.source = source
+        self.stages = stages
+        self.source_workers = source_workers
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.output = next_stage.input
+
+    def run(self):
+        for stage in self.stages:
+            stage.start()
+
+        emit = self.stages[0].input.put
+        sources = [
+            threading.Thread(target=self._run_source, args=(emit,), name=f"source-{i}", daemon=True)
+            for i in range(self.source_workers)
+        ]
+        for thread in sources:
+            thread.start()
+        for thread in sources:
+            thread.join()
+
+        # In order: a stage only finishes once everything upstream has been handed to it
+        for stage in self.stages:
+            stage.finish()
+
+    def _run_source(self, emit):
+        try:
+            self.source(emit)
+        except Exception as e:
+            logging.error(f"Pipeline source error: {e}")
@@ -0,0 +1,92 @@
+import os
+import time
+import logging
+import threading
+
+import database
+import timing
+
+# postgres: buckets live in the rate_limit_buckets table and are shared by
+# every worker process / node. memory: per-process only.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "postgres").lower()
+# After a database error the per-process buckets stand in for this many
+# seconds, then the shared buckets are tried again.
+RATE_LIMIT_RETRY_SECONDS = float(os.getenv("RATE_LIMIT_RETRY_SECONDS", "30"))
+
+# Token buckets, one per (provider, login account) and one per provider:
+# *_INTERVAL is seconds per token (0 disables the bucket), *_BURST is how
+# many posts may go back-to-back. Override per provider with e.g.
+# RATE_LIMIT_NAVER_ACCOUNT_INTERVAL=30.
+DEFAULTS = {
+    "ACCOUNT_INTERVAL": float(os.getenv("RATE_LIMIT_ACCOUNT_INTERVAL", "5")),
+    "ACCOUNT_BURST": float(os.getenv("RATE_LIMIT_ACCOUNT_BURST", "1")),
+    "PROVIDER_INTERVAL": float(os.getenv("RATE_LIMIT_PROVIDER_INTERVAL", "0")),
+    "PROVIDER_BURST": float(os.getenv("RATE_LIMIT_PROVIDER_BURST", "1")),
+}
+
+_local_buckets = {}     # key -> (tokens, last refill (monotonic))
+_local_lock = threading.Lock()
+_shared_retry_at = None   # monotonic time to retry the shared buckets, while they are down
+
+def setting(provider, name):
+    value = os.getenv(f"RATE_LIMIT_{provider.upper()}_{name}")
+    return float(value) if value else DEFAULTS[name]
+
+def buckets_for(provider, account_id):
+    """
+    [(key, rate per second, capacity)] of the buckets a post must pass.
+    """
+    buckets = []
+    for scope, key in (
+        ("ACCOUNT", f"{provider}:account:{account_id}"),
+        ("PROVIDER", f"{provider}"),
+    ):
+        interval = setting(provider, f"{scope}_INTERVAL")
+        if interval > 0:
+            buckets.append((key, 1.0 / interval, max(1.0, setting(provider, f"{scope}_BURST"))))
+    return buckets
+
+def _take_local(key, rate, capacity):
+    now = time.monotonic()
+    with _local_lock:
+        tokens, updated = _local_buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate) - 1
+        _local_buckets[key] = (tokens, now)
+        return tokens
+
+def take(key, rate, capacity):
+    """
+    Takes one token and returns how many seconds to wait before using it.
+    """
+    global _shared_retry_at
+    tokens = None
+    if RATE_LIMIT_BACKEND == "postgres" and (_shared_retry_at is None or time.monotonic() >= _shared_retry_at):
+        try:
+            tokens = database.take_rate_limit_token(key, rate, capacity)
+            if _shared_retry_at is not None:
+                logging.info("Shared rate limiter is back.")
+                _shared_retry_at = None
+        except Exception as e:
+            logging.warning(
+                f"Shared rate limiter unavailable, using per-process buckets "
+                f"for {RATE_LIMIT_RETRY_SECONDS:.0f}s: {e}"
+            )
+            _shared_retry_at = time.monotonic() + RATE_LIMIT_RETRY_SECONDS
+    if tokens is None:
+        tokens = _take_local(key, rate, capacity)
+    return max(0.0, -tokens / rate)
+
+def wait_turn(provider, account_id):
+    """
+    Blocks until both the account's and the provider's bucket allow another
+    post. Returns the seconds waited. Unrelated accounts never wait on each
+    other.
+    """
+    delay = 0.0
+    for key, rate, capacity in buckets_for(provider, account_id):
+        delay = max(delay, take(key, rate, capacity))
+    if delay > 0:
+        logging.info(f"Rate limit: waiting {delay:.1f}s before next {provider} post for account {account_id}.")
+        with timing.span("ratelimit.wait"):
+            time.sleep(delay)
+    return delay
@@ -0,0 +1,170 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+# Failure classes recorded in fail_reason. Transient ones are retried with
+# backoff; permanent ones fail the job right away.
+TRANSIENT = {
+    "timeout",          # page or element never showed up in time
+    "driver_crash",     # Chrome / chromedriver died or lost the session
+    "network",          # connection errors talking to the provider
+    "server_error",     # provider answered 5xx
+    "not_published",    # publish clicked but the post never appeared
+    "content_mismatch", # editor didn't take the body; nothing was published
+    "unknown",
+}
+PERMANENT = {
+    "login_failed",         # wrong credentials / could not verify login
+    "captcha",              # Naver login captcha
+    "account_protection",   # Kakao account protection
+    "selector_missing",     # page changed: a required element is gone
+    "rejected",             # provider refused the post (4xx)
+    "config",               # account data is incomplete (e.g. no blog_url)
+}
+# Failures that say something about one account, not about the provider;
+# they don't count toward the circuit breaker.
+ACCOUNT_FAILURES = {"login_failed", "captcha", "account_protection"}
+
+# Retries per job before it is failed for good
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+# Backoff: RETRY_BASE_SECONDS * 2^retry, capped, with +-50% jitter
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "60"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", "3600"))
+
+# Circuit breaker: open when at least BREAKER_MIN_SAMPLES of the last
+# BREAKER_WINDOW results exist and BREAKER_FAILURE_RATE of them failed;
+# stay open for BREAKER_COOLDOWN seconds, then let one probe job through.
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_SAMPLES = int(os.getenv("BREAKER_MIN_SAMPLES", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "300"))
+
+_local = threading.local()
+
+def note_failure(kind, detail=None, override=True):
+    """
+    Records why the current job (on this thread) failed. Posters call this
+    where they give up; report_result reads it back. With override=False a
+    more specific reason noted earlier is kept.
+    """
+    if override or getattr(_local, "failure", None) is None:
+        _local.failure = (kind, detail)
+
+def note_exception(e):
+    """
+    Records a failure from an exception, unless a reason was already noted.
+    """
+    detail = str(e).splitlines()[0] if str(e) else type(e).__name__
+    note_failure(classify_exception(e), detail, override=False)
+
+def clear_failure():
+    _local.failure = None
+
+def last_failure():
+    return getattr(_local, "failure", None) or ("unknown", None)
+
+def classify_exception(e):
+    """
+    Maps an exception to a failure class by type name, so selenium and
+    requests don't have to be imported here.
+    """
+    names = {cls.__name__ for cls in type(e).__mro__}
+    message = str(e).lower()
+    if "TimeoutException" in names or "Timeout" in names or "ReadTimeout" in names:
+        return "timeout"
+    if "NoSuchElementException" in names or "ElementNotInteractableException" in names:
+        return "selector_missing"
+    if "ConnectionError" in names or "ConnectTimeout" in names:
+        return "network"
+    if "WebDriverException" in names or "RemoteDisconnected" in names:
+        if any(s in message for s in ("disconnected", "not reachable", "invalid session", "session deleted", "crash")):
+            return "driver_crash"
+        return "unknown"
+    if "login failed" in message:
+        return "login_failed"
+    return "unknown"
+
+def is_transient(kind):
+    return kind in TRANSIENT
+
+def describe(kind, detail=None):
+    reason = f"{kind}: {detail}" if detail else kind
+    return reason[:500]
+
+class CircuitBreaker:
+    """
+    Per-provider breaker over a sliding window of job results.
+    closed -> open when the failure rate spikes; open -> half-open after the
+    cooldown, when callers send a single probe job; the next result closes
+    or re-opens it.
+    """
+
+    def __init__(self, name, window=None, min_samples=None, failure_rate=None, cooldown=None):
+        self.name = name
+        self.min_samples = min_samples or BREAKER_MIN_SAMPLES
+        self.failure_rate = failure_rate or BREAKER_FAILURE_RATE
+        self.cooldown = cooldown or BREAKER_COOLDOWN
+        self._results = deque(maxlen=window or BREAKER_WINDOW)
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """
+        True if work may be started against this provider.
+        """
+        return self.state != "open"
+
+    def seconds_until_retry(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record(self, success):
+        with self._lock:
+            state = self._state_locked()
+            if state == "open":
+                # Result of a job that started before the breaker opened
+                return
+            if state == "half-open":
+                if success:
+                    logging.info(f"Circuit breaker for {self.name} closed after successful probe.")
+                    self._opened_at = None
+                    self._results.clear()
+                else:
+                    logging.warning(f"Circuit breaker for {self.name} probe failed, staying open.")
+                    self._opened_at = time.monotonic()
+                return
+
+            self._results.append(success)
+            failures = self._results.count(False)
+            if (len(self._results) >= self.min_samples
+                    and failures / len(self._results) >= self.failure_rate):
+                logging.error(
+                    f"Circuit breaker for {self.name} opened: {failures}/{len(self._results)} "
+                    f"recent jobs failed. Pausing for {self.cooldown:.0f}s."
+                )
+                self._opened_at = time.monotonic()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
@@ -0,0 +1,108 @@
+import time
+import select
+import logging
+
+import database
+
+# Upper bound on one sleep, so missed notifications or lease expiries are
+# still picked up without a NOTIFY.
+MAX_SLEEP_SECONDS = 60
+# How often a sleep wakes to check for shutdown
+SHUTDOWN_CHECK_SECONDS = 1
+# Reopening a lost LISTEN connection: first retry after this many seconds,
+# doubling up to the cap. Timed polling covers the gap.
+LISTEN_RETRY_SECONDS = 5
+LISTEN_RETRY_MAX_SECONDS = 300
+
+def wait_for_notify(listener, timeout, shutdown_event):
+    """
+    Sleeps up to `timeout` seconds, returning early on a NOTIFY or shutdown.
+    Returns True if a notification arrived. Raises if the listener's
+    connection fails.
+    """
+    deadline = time.monotonic() + timeout
+    while not shutdown_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        step = min(remaining, SHUTDOWN_CHECK_SECONDS)
+        if listener is None:
+            shutdown_event.wait(step)
+            continue
+        readable, _, _ = select.select([listener], [], [], step)
+        if readable:
+            listener.poll()
+            if listener.notifies:
+                del listener.notifies[:]
+                return True
+    return False
+
+def open_listener():
+    try:
+        database.ensure_notify_trigger()
+        return database.open_listener()
+    except Exception as e:
+        logging.warning(f"LISTEN unavailable, falling back to timed polling: {e}")
+        return None
+
+def close_listener(listener):
+    if listener is not None:
+        try:
+            listener.close()
+        except Exception:
+            pass
+
+def run_event_scheduler(runners, shutdown_event, max_sleep=None, breakers=None):
+    """
+    Runs each provider as soon as its next pending job is due.
+
+    runners: { provider_id: run_fn } - run_fn drains that provider's due jobs.
+    breakers: { provider_id: CircuitBreaker } - a provider whose breaker is
+    open is not run before its cooldown ends, even if jobs are due.
+    Sleeps until the earliest reserved_at among pending publish_contents, and
+    wakes early when Postgres NOTIFYs about a new or rescheduled job. If the
+    LISTEN connection is unavailable or drops (e.g. Postgres restarts), it
+    polls on a timer and reopens the connection with backoff.
+    """
+    max_sleep = max_sleep or MAX_SLEEP_SECONDS
+    breakers = breakers or {}
+    listener = None
+    retry_delay = LISTEN_RETRY_SECONDS
+    retry_at = 0
+    try:
+        while not shutdown_event.is_set():
+            if listener is None and time.monotonic() >= retry_at:
+                listener = open_listener()
+                if listener is None:
+                    retry_at = time.monotonic() + retry_delay
+                    retry_delay = min(retry_delay * 2, LISTEN_RETRY_MAX_SECONDS)
+                else:
+                    retry_delay = LISTEN_RETRY_SECONDS
+
+            seconds_until = database.get_seconds_until_due(list(runners))
+            for provider_id, breaker in breakers.items():
+                if provider_id in seconds_until and not breaker.allow():
+                    seconds_until[provider_id] = max(seconds_until[provider_id], breaker.seconds_until_retry())
+
+            due = [pid for pid, seconds in seconds_until.items() if seconds <= 0]
+            for provider_id in due:
+                if shutdown_event.is_set():
+                    break
+                runners[provider_id]()
+            if due:
+                # Re-check almost right away: new jobs may have come due while posting
+                shutdown_event.wait(SHUTDOWN_CHECK_SECONDS)
+                continue
+
+            sleep_for = min([max_sleep] + list(seconds_until.values()))
+            logging.info(f"Next job due in {sleep_for:.1f}s. Sleeping until then or until notified.")
+            try:
+                if wait_for_notify(listener, sleep_for, shutdown_event):
+                    logging.info("Woken by new job notification.")
+            except Exception as e:
+                logging.warning(f"LISTEN connection lost, polling until it is reopened: {e}")
+                close_listener(listener)
+                listener = None
+                retry_at = time.monotonic() + retry_delay
+    finally:
+        close_listener(listener)
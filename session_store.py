@@ -0,0 +1,184 @@
+import logging
+import os
+import json
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Saved logins live here as <provider>_<account_id>.json (cookies + localStorage).
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR", "sessions")
+# Sessions older than this are not restored; the provider expires them anyway.
+SESSION_MAX_AGE = float(os.getenv("SESSION_MAX_AGE", str(7 * 24 * 3600)))
+# Browser-free posting sends this so requests look like the Chrome we log in with
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+)
+
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+def _session_path(provider, account_id):
+    return os.path.join(SESSION_STORE_DIR, f"{provider}_{account_id}.json")
+
+def load_session(provider, account_id):
+    """
+    Returns the saved session dict for an account, or None if missing/expired.
+    """
+    if account_id is None:
+        return None
+    path = _session_path(provider, account_id)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Could not read session {path}: {e}")
+        return None
+
+    if time.time() - data.get("saved_at", 0) > SESSION_MAX_AGE:
+        logging.warning(f"Session for {provider}/{account_id} expired.")
+        discard_session(provider, account_id)
+        return None
+    return data
+
+def save_session(driver, provider, account_id):
+    """
+    Saves every cookie in the browser plus localStorage of the current page's
+    origin, so the next job for this account can skip the login flow.
+    """
+    if account_id is None:
+        return
+
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+        origin = driver.execute_script("return window.location.origin;")
+        local_storage = driver.execute_script("""
+            var items = {};
+            for (var i = 0; i < window.localStorage.length; i++) {
+                var key = window.localStorage.key(i);
+                items[key] = window.localStorage.getItem(key);
+            }
+            return items;
+        """) or {}
+
+        data = {
+            "saved_at": time.time(),
+            "cookies": cookies,
+            "local_storage": {origin: local_storage} if origin and origin != "null" else {},
+        }
+
+        os.makedirs(SESSION_STORE_DIR, exist_ok=True)
+        path = _session_path(provider, account_id)
+        tmp_path = f"{path}.tmp"
+        # Cookies are credentials; keep the file private to this user.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        # A cached HTTP session still holds the old cookies
+        drop_http_session(provider, account_id, discard=False)
+        logging.info(f"Saved session for {provider}/{account_id} ({len(cookies)} cookies).")
+    except Exception as e:
+        logging.error(f"Failed to save session for {provider}/{account_id}: {e}")
+
+def restore_session(driver, provider, account_id):
+    """
+    Loads a saved session into the browser. Returns True if something was
+    restored; the caller still has to validate that the login is alive.
+    """
+    data = load_session(provider, account_id)
+    if not data:
+        return False
+
+    try:
+        cookies = []
+        for cookie in data.get("cookies", []):
+            # Network.setCookies rejects the read-only fields getAllCookies returns.
+            c = {k: v for k, v in cookie.items() if k in (
+                "name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires"
+            )}
+            if c.get("expires", -1) < 0:
+                c.pop("expires", None)
+            cookies.append(c)
+        if cookies:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+
+        for origin, items in data.get("local_storage", {}).items():
+            if not items:
+                continue
+            driver.get(origin)
+            driver.execute_script("""
+                var items = arguments[0];
+                for (var key in items) {
+                    window.localStorage.setItem(key, items[key]);
+                }
+            """, items)
+
+        logging.info(f"Restored session for {provider}/{account_id}.")
+        return True
+    except Exception as e:
+        logging.error(f"Failed to restore session for {provider}/{account_id}: {e}")
+        return False
+
+def discard_session(provider, account_id):
+    """
+    Drops a saved session, e.g. after it failed validation.
+    """
+    if account_id is None:
+        return
+    try:
+        os.remove(_session_path(provider, account_id))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.error(f"Failed to discard session for {provider}/{account_id}: {e}")
+
+def get_http_session(provider, account_id):
+    """
+    Returns a connection-pooled requests.Session carrying the saved browser
+    cookies for this account, or None if there is no saved session.
+    Sessions are cached per account and reused across posts.
+    """
+    key = (provider, account_id)
+    with _http_sessions_lock:
+        if key in _http_sessions:
+            return _http_sessions[key]
+
+    data = load_session(provider, account_id)
+    if not data:
+        return None
+
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=1)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    http.headers["User-Agent"] = HTTP_USER_AGENT
+    for cookie in data.get("cookies", []):
+        http.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+        )
+
+    with _http_sessions_lock:
+        _http_sessions[key] = http
+    return http
+
+def drop_http_session(provider, account_id, discard=True):
+    """
+    Forgets the cached HTTP session, e.g. after the server rejected it.
+    With discard=True the saved browser session is dropped as well, so the
+    next browser run performs a full login.
+    """
+    with _http_sessions_lock:
+        http = _http_sessions.pop((provider, account_id), None)
+    if http is not None:
+        http.close()
+    if discard:
+        discard_session(provider, account_id)
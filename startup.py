@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+
+# Set when this module is first imported, which main.py does before anything else
+_started = time.perf_counter()
+_env_loaded = False
+_steps = []     # [(name, seconds)] in the order they ran
+
+def load_env():
+    """
+    Loads .env into os.environ, once per process. Modules read their settings
+    when they are imported, so this must run before they are. Variables that
+    are already set (container env, bench/) take precedence over .env.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    with step("load .env"):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+@contextmanager
+def step(name):
+    """
+    Times one startup step for the --import-profile report.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((name, time.perf_counter() - start))
+
+def import_module(name):
+    """
+    Imports a module on first use and records how long it took. Heavy
+    modules (Selenium, SQLAlchemy) are loaded through here when the first
+    job that needs them is dispatched instead of at startup.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with step(f"import {name}"):
+        return importlib.import_module(name)
+
+def loaded(name):
+    """
+    The module if something already imported it, else None; for cleanup
+    code that should not load a module just to find it has nothing to do.
+    """
+    return sys.modules.get(name)
+
+def elapsed():
+    return time.perf_counter() - _started
+
+def import_profile(deferred):
+    """
+    Report of startup so far plus what each deferred module costs to import.
+    Modules are imported in the order given, so a dependency they share is
+    counted against the first one.
+    """
+    ready = elapsed()
+    lines = ["Startup (ms)"]
+    for name, seconds in _steps:
+        lines.append(f"  {name:32} {seconds * 1000:8.1f}")
+    lines.append(f"  {'ready':32} {ready * 1000:8.1f}")
+    lines.append("")
+    lines.append("Deferred until first use (ms)")
+    total = 0.0
+    for name in deferred:
+        if name in sys.modules:
+            lines.append(f"  {name:32} {'already loaded':>14}")
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            seconds = time.perf_counter() - start
+            total += seconds
+            lines.append(f"  {name:32} {seconds * 1000:8.1f}")
+        except Exception as e:
+            lines.append(f"  {name:32} {'failed':>8}  ({type(e).__name__}: {e})")
+    lines.append(f"  {'total':32} {total * 1000:8.1f}")
+    lines.append("")
+    lines.append(f"Per-module detail: {os.path.basename(sys.executable)} -X importtime main.py --import-profile")
+    return "\n".join(lines)
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+import database
+
+
+class CountingSession:
+    """
+    Stands in for a SQLAlchemy session: answers the job query with `rows`,
+    the image query with `images`, and records every statement executed.
+    """
+
+    def __init__(self, rows, images):
+        self.rows = rows
+        self.images = images
+        self.statements = []
+
+    def __call__(self):
+        return self
+
+    def remove(self):
+        pass
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params))
+        result = self.images if "content_images" in sql else self.rows
+        return SimpleNamespace(fetchall=lambda: result)
+
+
+def job_row(publish_id, image_ids):
+    return SimpleNamespace(
+        publish_id=publish_id,
+        content_image_ids=image_ids,
+        content_video_id=None,
+        account_id=1,
+        login_account_id=1,
+        blog_id="blog",
+        blog_pw="pw",
+        blog_url="https://blog.example.com",
+        category_no=None,
+        content_html="<p>body</p>",
+        content_title=f"title {publish_id}",
+    )
+
+
+@pytest.mark.parametrize("count", [1, 5, 50])
+def test_get_scheduled_jobs_uses_two_statements(monkeypatch, count):
+    rows = [job_row(i, f"[{2 * i}, {2 * i + 1}]") for i in range(count)]
+    images = [SimpleNamespace(id=img_id, image_url=f"https://img/{img_id}.jpg") for img_id in range(2 * count)]
+    session = CountingSession(rows, images)
+    monkeypatch.setattr(database, "Session", session)
+
+    jobs = database.get_scheduled_jobs(1)
+
+    # One query for the jobs, one for every image of every job
+    assert len(session.statements) == 2
+    assert len(jobs) == count
+    assert jobs[-1]['images'] == [f"https://img/{2 * count - 2}.jpg", f"https://img/{2 * count - 1}.jpg"]
+
+
+def test_rows_to_jobs_shares_one_image_query():
+    rows = [job_row(1, "[10, 11]"), job_row(2, [11]), job_row(3, None)]
+    images = [
+        SimpleNamespace(id=11, image_url="b.jpg"),
+        SimpleNamespace(id=10, image_url="a.jpg"),
+    ]
+    session = CountingSession(rows, images)
+
+    jobs = database.rows_to_jobs(session, rows)
+
+    assert len(session.statements) == 1
+    assert set(session.statements[0][1]['ids']) == {10, 11}
+    # Order follows the query's ORDER BY "order", not the id list
+    assert [job['images'] for job in jobs] == [["b.jpg", "a.jpg"], ["b.jpg"], []]
+
+
+def test_rows_to_jobs_without_images_runs_no_query():
+    rows = [job_row(1, None), job_row(2, "[]")]
+    session = CountingSession(rows, [])
+
+    jobs = database.rows_to_jobs(session, rows)
+
+    assert session.statements == []
+    assert [job['images'] for job in jobs] == [[], []]
+
+
+class FailingDetailSession(CountingSession):
+    """
+    Claims two jobs, then fails on the job-detail query.
+    """
+
+    def __init__(self):
+        super().__init__(rows=[], images=[])
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params))
+        if "information_schema" in sql:
+            return SimpleNamespace(fetchall=lambda: [SimpleNamespace(column_name=name) for name in database.CLAIM_COLUMNS])
+        if "RETURNING pc.id" in sql:
+            return SimpleNamespace(fetchall=lambda: [SimpleNamespace(id=1), SimpleNamespace(id=2)])
+        if "SET claimed_by = NULL" in sql:
+            return SimpleNamespace(rowcount=2)
+        raise RuntimeError("connection lost")
+
+
+def test_claim_jobs_releases_claims_when_details_fail(monkeypatch):
+    session = FailingDetailSession()
+    monkeypatch.setattr(database, "Session", session)
+    monkeypatch.setattr(database, "_claim_schema_ready", False)
+
+    assert database.claim_jobs(1, worker_id="w1") == []
+
+    sql, params = session.statements[-1]
+    assert "SET claimed_by = NULL" in sql
+    assert set(params['ids']) == {1, 2} and params['worker_id'] == "w1"
+    # The columns already exist, so no ALTER TABLE was issued
+    assert not any("ALTER TABLE" in sql for sql, _ in session.statements)
@@ -0,0 +1,259 @@
+import logging
+import os
+import json
+import time
+import queue
+import atexit
+import inspect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Spans are appended here as JSON lines. Empty SPAN_LOG_FILE disables writing.
+SPAN_LOG_FILE = os.getenv("SPAN_LOG_FILE", "spans.jsonl")
+SPANS_ENABLED = os.getenv("SPANS_ENABLED", "true").lower() == "true"
+# Span lines waiting for the writer thread; beyond this they are dropped
+# rather than holding up the step that emitted them.
+SPAN_QUEUE_SIZE = int(os.getenv("SPAN_QUEUE_SIZE", "10000"))
+
+# Prometheus histogram buckets (seconds)
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# provider / publish_id / account_id of the job being worked on (per thread)
+_context = contextvars.ContextVar("span_context", default={})
+
+_span_queue = queue.Queue(maxsize=SPAN_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+dropped_spans = 0
+_metrics_lock = threading.Lock()
+_histograms = {}   # (span, provider, status) -> [bucket counts..., count, sum]
+
+@contextmanager
+def job_context(**fields):
+    """
+    Attaches fields (provider, publish_id, account_id) to every span emitted
+    inside the block on this thread.
+    """
+    token = _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def current_context():
+    return dict(_context.get())
+
+def emit(name, duration, status="ok", **fields):
+    """
+    Records one finished span: a JSON line plus the Prometheus histogram.
+    """
+    if not SPANS_ENABLED:
+        return
+    record = {
+        "ts": round(time.time(), 3),
+        "span": name,
+        "duration_ms": round(duration * 1000, 1),
+        "status": status,
+        **current_context(),
+        **fields,
+    }
+    _observe(name, record.get("provider", ""), status, duration)
+
+    if SPAN_LOG_FILE:
+        global dropped_spans
+        if _writer is None:
+            _start_writer()
+        try:
+            _span_queue.put_nowait(json.dumps(record, ensure_ascii=False, default=str))
+        except queue.Full:
+            dropped_spans += 1
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_spans, name="span-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush_spans)
+
+def _write_spans():
+    # One handle for the life of the process, flushed whenever the queue runs dry
+    try:
+        f = open(SPAN_LOG_FILE, "a", encoding="utf-8")
+    except OSError as e:
+        logging.error(f"Cannot open span log {SPAN_LOG_FILE}: {e}")
+        f = None
+    while True:
+        line = _span_queue.get()
+        try:
+            if f is not None:
+                f.write(line + "\n")
+                if _span_queue.empty():
+                    f.flush()
+        except OSError as e:
+            logging.error(f"Span log write failed: {e}")
+        finally:
+            _span_queue.task_done()
+
+def flush_spans():
+    """
+    Blocks until every span emitted so far is written out.
+    """
+    if _writer is not None:
+        _span_queue.join()
+
+@contextmanager
+def span(name, **fields):
+    """
+    Times the enclosed block. Exceptions mark the span as 'error' and propagate.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        emit(name, time.perf_counter() - start, status, **fields)
+
+def timed(name):
+    """
+    Decorator form of span(). A False return value marks the span 'failed',
+    matching the posters' boolean results. Works on coroutine functions too.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                status = "ok"
+                try:
+                    result = await func(*args, **kwargs)
+                    if result is False:
+                        status = "failed"
+                    return result
+                except BaseException:
+                    status = "error"
+                    raise
+                finally:
+                    emit(name, time.perf_counter() - start, status)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                result = func(*args, **kwargs)
+                if result is False:
+                    status = "failed"
+                return result
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                emit(name, time.perf_counter() - start, status)
+        return wrapper
+    return decorator
+
+class Phases:
+    """
+    Sequential phase timer for long functions: start() ends the previous
+    phase and begins the next; close() ends the last one.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._name = None
+        self._start = None
+
+    def start(self, name):
+        self.end()
+        self._name = name
+        self._start = time.perf_counter()
+
+    def end(self, status="ok"):
+        if self._name is not None:
+            emit(f"{self.prefix}.{self._name}", time.perf_counter() - self._start, status)
+            self._name = None
+
+    def close(self, status="ok"):
+        self.end(status)
+
+def _observe(name, provider, status, duration):
+    key = (name, provider or "", status)
+    with _metrics_lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(BUCKETS) + [0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                hist[i] += 1
+        hist[-2] += 1
+        hist[-1] += duration
+
+def render_prometheus():
+    """
+    Span durations in Prometheus text exposition format.
+    """
+    lines = [
+        "# HELP blog_upload_span_seconds Duration of posting pipeline steps.",
+        "# TYPE blog_upload_span_seconds histogram",
+    ]
+    with _metrics_lock:
+        items = sorted(_histograms.items())
+    for (name, provider, status), hist in items:
+        labels = f'span="{name}",provider="{provider}",status="{status}"'
+        for i, bound in enumerate(BUCKETS):
+            lines.append(f'blog_upload_span_seconds_bucket{{{labels},le="{bound}"}} {hist[i]}')
+        lines.append(f'blog_upload_span_seconds_bucket{{{labels},le="+Inf"}} {hist[-2]}')
+        lines.append(f"blog_upload_span_seconds_count{{{labels}}} {hist[-2]}")
+        lines.append(f"blog_upload_span_seconds_sum{{{labels}}} {hist[-1]:.6f}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_textfile(path=None):
+    """
+    Writes the metrics for node_exporter's textfile collector
+    (PROMETHEUS_TEXTFILE env), atomically.
+    """
+    path = path or os.getenv("PROMETHEUS_TEXTFILE")
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+def _metrics_handler():
+    # http.server pulls in email/html/mimetypes; only pay for it when serving
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+def start_prometheus_server(port=None):
+    """
+    Serves /metrics on PROMETHEUS_PORT from a daemon thread, if configured.
+    """
+    port = port or os.getenv("PROMETHEUS_PORT")
+    if not port:
+        return None
+    from http.server import HTTPServer
+    server = HTTPServer(("0.0.0.0", int(port)), _metrics_handler())
+    threading.Thread(target=server.serve_forever, name="prometheus", daemon=True).start()
+    logging.info(f"Prometheus metrics on :{port}")
+    return server
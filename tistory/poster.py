@@ -1,4 +1,5 @@
 
+import logging
 import time
 import json
 import random
@@ -10,11 +11,24 @@ from selenium.webdriver.common.action_chains import ActionChains
 import os
 
 try:
-    from browser import get_driver
+    from browser import checkout_driver, checkin_driver
 except ImportError:
     import sys
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from browser import get_driver
+    from browser import checkout_driver, checkin_driver
+import artifacts
+import ratelimit
+import retry
+import session_store
+import timing
+from waits import wait_for, wait_until, KAKAO_ACCOUNTS_HOST, TISTORY_HOST
+
+# TISTORY_HTTP_MODE=true: publish with plain HTTP requests using the saved
+# login cookies; Chrome is only used when there is no valid saved session.
+TISTORY_HTTP_MODE = os.getenv("TISTORY_HTTP_MODE", "false").lower() == "true"
+TISTORY_HTTP_TIMEOUT = float(os.getenv("TISTORY_HTTP_TIMEOUT", "30"))
+# bench/ points this at its local mock pages
+TISTORY_HOME_URL = os.getenv("TISTORY_HOME_URL", "https://www.tistory.com")
 
 def input_key_value(driver, element, value):
     """
@@ -27,33 +41,114 @@ def input_key_value(driver, element, value):
         arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
     """, element)
 
-def login_kakao(driver, user_id, user_pw):
+# The HTML-mode code editor (Ace, or CodeMirror) as `editor`, or null
+FIND_EDITOR_JS = """
+    var editor = null;
+    var aceEl = document.querySelector('.ace_editor');
+    if (aceEl) {
+        editor = (aceEl.env && aceEl.env.editor) || (window.ace && window.ace.edit(aceEl));
+    }
+    if (!editor) {
+        var cmEl = document.querySelector('.CodeMirror');
+        editor = cmEl && cmEl.CodeMirror;
+    }
+"""
+
+def get_editor_content(driver):
+    """
+    The code editor's current value, or None if there is no editor.
+    """
+    return driver.execute_script(FIND_EDITOR_JS + """
+        return editor ? editor.getValue() : null;
+    """)
+
+def editor_holds(driver, html_content):
+    """
+    True if the editor holds html_content, ignoring whitespace differences
+    (keystroke input goes through the editor's auto-indent).
+    """
+    value = get_editor_content(driver)
+    return value is not None and value.split() == html_content.split()
+
+def set_editor_content(driver, html_content):
+    """
+    Sets the whole HTML body through the code editor's JS API (Ace, or
+    CodeMirror) in one call, and returns True if the editor then holds
+    exactly that text. On a mismatch the editor is emptied again so the
+    keystroke fallback doesn't append to a half-set body.
+    """
+    return driver.execute_script(FIND_EDITOR_JS + """
+        var html = arguments[0];
+        if (!editor) {
+            return false;
+        }
+        editor.setValue(html, 1);
+        if (editor.getValue() === html) {
+            return true;
+        }
+        editor.setValue('', 1);
+        return false;
+    """, html_content)
+
+def is_tistory_logged_in(driver):
+    """
+    Cheap login check: tistory.com issues a TSSESSION cookie once logged in
+    and stops showing the login link in the header.
+    """
+    driver.get(f"{TISTORY_HOME_URL}/")
+    wait_until(driver, "page_loaded")
+    if not driver.get_cookie("TSSESSION"):
+        return False
+    login_links = driver.find_elements(By.CSS_SELECTOR, "a.link_login, a[href*='/auth/login']")
+    return not any(link.is_displayed() for link in login_links)
+
+def save_confirmed_session(driver, account_id):
+    """
+    Saves the session only once is_tistory_logged_in confirms it, so dead
+    cookies never get stored for the HTTP mode or the next restore.
+    Returns whether the login was confirmed.
+    """
+    if is_tistory_logged_in(driver):
+        session_store.save_session(driver, "tistory", account_id)
+        return True
+    logging.warning("Login could not be confirmed; session not saved.")
+    return False
+
+@timing.timed("tistory.login")
+def login_kakao(driver, user_id, user_pw, account_id=None):
     """
     Logins to Tistory via Kakao Account using 'Click then Type' logic.
+    A saved session for account_id is tried first; the Kakao flow only runs
+    when that session is missing or dead.
     """
-    print(f"DEBUG: Tistory login_kakao called with ID: {user_id}, PW: {user_pw[:3] if user_pw else 'None'}***")
-    print("Navigating to Tistory Login...")
-    driver.get("https://www.tistory.com/auth/login")
-    time.sleep(2)
+    try:
+        if session_store.restore_session(driver, "tistory", account_id):
+            if is_tistory_logged_in(driver):
+                logging.info("Restored saved session, already logged in.")
+                return True
+            logging.warning("Saved session is no longer valid, falling back to login.")
+            session_store.discard_session("tistory", account_id)
+    except Exception as e:
+        logging.error(f"Error checking saved session: {e}")
+
+    logging.info("Navigating to Tistory Login...")
+    driver.get(f"{TISTORY_HOME_URL}/auth/login")
     
     # Click 'Kakao Login' button
     try:
-        kakao_login_btn = driver.find_element(By.CSS_SELECTOR, ".btn_login.link_kakao_id")
+        kakao_login_btn = wait_for(driver, "tistory_kakao_button")
         kakao_login_btn.click()
+        wait_until(driver, "kakao_login_page")
     except:
         pass
-        
-    time.sleep(2)
     
     # Check if on Kakao login page
-    if "accounts.kakao.com" in driver.current_url:
-        print(f"On Kakao Login Page. Inputting credentials for {user_id}...")
+    if KAKAO_ACCOUNTS_HOST in driver.current_url:
+        logging.info(f"On Kakao Login Page. Inputting credentials for {user_id}...")
         try:
             # Login Input
             # 1. ID
-            id_input = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "loginId--1"))
-            )
+            id_input = wait_for(driver, "kakao_login_form")
             ActionChains(driver).move_to_element(id_input).click().perform()
             time.sleep(0.5)
             
@@ -83,24 +178,28 @@ def login_kakao(driver, user_id, user_pw):
             # Submit
             submit_btn = driver.find_element(By.CSS_SELECTOR, "button.btn_g.highlight.submit")
             submit_btn.click()
-            time.sleep(10)
+            wait_until(driver, "kakao_login_done")
             
             # Check success
             curr_url = driver.current_url or ""
-            if "tistory.com" in curr_url or "blog.tistory.com" in curr_url:
-                print("Login successful.")
-                return True
-            elif "protect" in curr_url:
-                print("CRITICAL: Kakao Account Protection triggered.")
+            if "protect" in curr_url:
+                logging.error("CRITICAL: Kakao Account Protection triggered.")
+                retry.note_failure("account_protection")
                 return False
-            else:
-                 return True 
+            if TISTORY_HOST in curr_url and save_confirmed_session(driver, account_id):
+                logging.info("Login successful.")
+                return True
+            # Optimistic: the editor step fails the job if we are not logged in
+            return True
                  
         except Exception as e:
-            print(f"Kakao Login failed: {e}")
-            driver.save_screenshot("debug_tistory_login_fail.png")
+            logging.error(f"Kakao Login failed: {e}")
+            retry.note_exception(e)
+            artifacts.capture(driver, "login_fail")
             return False
             
+    # Never reached the Kakao form (already logged in?); optimistic as above
+    save_confirmed_session(driver, account_id)
     return True
 
 def format_content_to_html(text, images):
@@ -138,147 +237,157 @@ def format_content_to_html(text, images):
             
     return "".join(html_parts)
 
-def post_tistory(job_data):
+def render_job(job_data):
     """
-    Executes Tistory posting using strict user flow.
+    Renders the post body ahead of time (pipeline render stage), so the
+    browser step only has to type it in.
     """
-    # Credentials
-    user_id = job_data['blog_id']
-    user_pw = job_data['blog_pw']
-    
-    # Blog URL
-    blog_url = job_data.get('blog_url')
-    if not blog_url: return False
+    job_data['rendered_html'] = format_content_to_html(job_data.get('content', ''), job_data.get('images', []))
+    return job_data
+
+def rendered_html(job_data):
+    html = job_data.get('rendered_html')
+    if html is None:
+        html = format_content_to_html(job_data.get('content', ''), job_data.get('images', []))
+    return html
+
+def normalize_blog_url(blog_url):
+    if not blog_url:
+        return None
     blog_url = blog_url.rstrip('/')
     if not blog_url.startswith('http'):
         blog_url = f"https://{blog_url}"
+    return blog_url
+
+def write_tistory_post(driver, job_data):
+    """
+    Opens the editor on an already logged-in driver and publishes one post.
+    """
+    blog_url = normalize_blog_url(job_data.get('blog_url'))
+    if not blog_url:
+        retry.note_failure("config", "account has no blog_url")
+        return False
 
     title = job_data.get('title', 'No Title')
-    content_raw = job_data.get('content', '')
-    images = job_data.get('images', [])
     category_id = str(job_data.get('category_no', ''))
+    ratelimit.wait_turn("tistory", job_data.get('login_account_id'))
+    phases = timing.Phases("tistory")
+    retry.clear_failure()
 
-    print(f"Starting Tistory Post to {blog_url}...")
-    
-    driver = None
     try:
-        driver = get_driver()
-        
-        # 1. Login
-        if not login_kakao(driver, user_id, user_pw):
-            return False
-            
+        phases.start("editor_load")
         # 2. Navigate to Blog Home & Click Write
-        print(f"Navigating to Blog Home: {blog_url}")
+        logging.info(f"Navigating to Blog Home: {blog_url}")
         driver.get(blog_url)
-        time.sleep(3)
+        wait_until(driver, "page_loaded")
         
         try:
             # <button type="button" class="btn-g btn-primary btn-write">글쓰기</button>
             write_btn = driver.find_element(By.CSS_SELECTOR, "button.btn-write, .btn-write, a[href*='/manage/newpost']")
             write_btn.click()
-            print("Clicked Write button.")
+            logging.info("Clicked Write button.")
         except:
-            print("Write button not found on home, trying direct URL...")
+            logging.warning("Write button not found on home, trying direct URL...")
             driver.get(f"{blog_url}/manage/newpost")
             
-        time.sleep(5)
+        wait_until(driver, "tistory_editor_ready")
         
         # 2.5 Handle "Draft Saved" alert if it exists
         try:
             alert = driver.switch_to.alert
-            print(f"Draft Alert detected: {alert.text}")
+            logging.info(f"Draft Alert detected: {alert.text}")
             alert.dismiss() # Or alert.accept()? User said "취소를 누르고" -> dismiss()
-            print("Dismissed draft saved alert.")
-            time.sleep(1)
+            logging.info("Dismissed draft saved alert.")
         except:
             pass
         
         # 3. Switch to HTML Mode
         try:
-            mode_btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "editor-mode-layer-btn-open"))
-            )
+            mode_btn = wait_for(driver, "tistory_mode_button")
             mode_btn.click()
-            time.sleep(0.5)
             
-            html_item = driver.find_element(By.ID, "editor-mode-html")
+            html_item = wait_for(driver, "tistory_html_mode_item")
             html_item.click()
-            print("Switched to HTML mode.")
-            time.sleep(1)
+            logging.info("Switched to HTML mode.")
             
             try:
-                alert = driver.switch_to.alert
+                alert = wait_for(driver, "alert_present")
                 alert.accept()
-                print("Accepted HTML switch alert.")
+                logging.info("Accepted HTML switch alert.")
             except:
                 pass
                 
         except Exception as e:
-            print(f"HTML Switch failed: {e}")
+            logging.error(f"HTML Switch failed: {e}")
             
         # 4. Select Category
+        phases.start("category_select")
         if category_id:
             try:
-                print(f"Attempting to select Category ID: {category_id}")
+                logging.info(f"Attempting to select Category ID: {category_id}")
                 cat_btn = driver.find_element(By.ID, "category-btn")
                 cat_btn.click()
-                print("Clicked Category Button.")
+                logging.info("Clicked Category Button.")
                 
                 # Wait for the list to appear
                 # User provided: <div id="category-list" ...>
-                try:
-                    WebDriverWait(driver, 5).until(
-                        EC.visibility_of_element_located((By.ID, "category-list"))
-                    )
-                except:
-                    print("Category list check timed out, proceeding anyway.")
-                
-                time.sleep(1) 
+                if not wait_until(driver, "tistory_category_list"):
+                    logging.warning("Category list check timed out, proceeding anyway.")
                 
                 # Find selector by attribute
                 target_cat = driver.find_element(By.CSS_SELECTOR, f"div[category-id='{category_id}']")
                 
                 # Ensure visible?
                 if target_cat and not target_cat.is_displayed():
-                     print("Category item hidden, trying script click.")
+                     logging.info("Category item hidden, trying script click.")
                      driver.execute_script("arguments[0].click();", target_cat)
                 elif target_cat:
                     target_cat.click()
                 else:
-                    print(f"Error: Category {category_id} not found.")
+                    logging.error(f"Error: Category {category_id} not found.")
                     
-                print(f"Selected category {category_id}")
+                logging.info(f"Selected category {category_id}")
             except Exception as e:
-                print(f"Category selection failed: {e}")
+                logging.error(f"Category selection failed: {e}")
                 
         # 5. Input Title
+        phases.start("title_input")
         try:
             title_inp = driver.find_element(By.ID, "post-title-inp")
             title_inp.click()
             time.sleep(0.5)
             title_inp.send_keys(title)
-            print("Entered Title.")
+            logging.info("Entered Title.")
         except Exception as e:
-             print(f"Title input failed: {e}")
+             logging.error(f"Title input failed: {e}")
 
         # 6. Input Content (HTML)
-        html_content = format_content_to_html(content_raw, images)
-        time.sleep(1)
+        phases.start("content_input")
+        html_content = rendered_html(job_data)
+        wait_until(driver, "tistory_content_input")
         
         try:
             # Strategies to focus Content Area
             # Tistory HTML mode uses AceEditor often
             content_entered = False
+
+            # Strategy 0: Set the whole body through the editor API (one call)
+            try:
+                if set_editor_content(driver, html_content):
+                    content_entered = True
+                    logging.info("Entered Content (Editor API).")
+            except Exception as e:
+                logging.warning(f"Editor API input failed, falling back to keystrokes: {e}")
             
             # Strategy A: Find the Ace Text Input (often 1px hidden but accepts keys)
-            try:
-                ace_input = driver.find_element(By.CSS_SELECTOR, "textarea.ace_text-input")
-                ace_input.send_keys(html_content)
-                content_entered = True
-                print("Entered Content (Ace Input).")
-            except:
-                pass
+            if not content_entered:
+                try:
+                    ace_input = driver.find_element(By.CSS_SELECTOR, "textarea.ace_text-input")
+                    ace_input.send_keys(html_content)
+                    content_entered = True
+                    logging.info("Entered Content (Ace Input).")
+                except:
+                    pass
                 
             # Strategy B: Tab from Title
             if not content_entered:
@@ -292,67 +401,283 @@ def post_tistory(job_data):
                     time.sleep(0.5)
                     actions.send_keys(html_content).perform()
                     content_entered = True
-                    print("Entered Content (Tab Navigation).")
+                    logging.info("Entered Content (Tab Navigation).")
                 except:
                     pass
             
             if not content_entered:
                 # Strategy C: Active Element Fallback
                 driver.switch_to.active_element.send_keys(html_content)
-                print("Entered Content (Active Element Fallback).")
+                logging.info("Entered Content (Active Element Fallback).")
 
+            # Keystrokes can land in the wrong field or be dropped; only what
+            # the editor actually holds counts.
+            content_ok = editor_holds(driver, html_content)
         except Exception as e:
-            print(f"Content input failed: {e}")
+            logging.error(f"Content input failed: {e}")
+            if retry.classify_exception(e) == "driver_crash":
+                retry.note_exception(e)
+            else:
+                retry.note_failure("content_mismatch", "content input failed")
+            artifacts.capture(driver, "content_input")
+            return False
+        if not content_ok:
+            # Publishing now would put a wrong or empty body online
+            logging.error("Editor text does not match the content; not publishing.")
+            retry.note_failure("content_mismatch", "editor body differs from content")
+            artifacts.capture(driver, "content_mismatch")
+            return False
             
-        time.sleep(2)
+        phases.start("publish")
 
         # 7. Publish
         try:
-            complete_btn = driver.find_element(By.ID, "publish-layer-btn")
+            # wait_for raises TimeoutException (transient) while the editor is
+            # still loading; a missing element after that means the page changed.
+            complete_btn = wait_for(driver, "tistory_publish_layer_button")
             complete_btn.click()
-            print("Clicked Compelte (Open Layer).")
-            time.sleep(1)
+            logging.info("Clicked Compelte (Open Layer).")
+            wait_for(driver, "tistory_publish_layer_open")
             
             try:
                 public_label = driver.find_element(By.XPATH, "//span[contains(text(), '공개')]")
                 public_label.click()
-                print("Selected Public.")
+                logging.info("Selected Public.")
             except:
                 pass
-                
-            time.sleep(1)
             
             final_btn = driver.find_element(By.ID, "publish-btn")
             final_btn.click()
-            print("Clicked Final Publish.")
+            logging.info("Clicked Final Publish.")
             
-            time.sleep(5)
+            wait_until(driver, "tistory_post_published")
             # Check success (redirect to entry)
             if "/entry/" in driver.current_url or "numeric ID" in driver.current_url:
-                print("Published successfully.")
+                logging.info("Published successfully.")
+                artifacts.capture(driver, "published", success=True)
                 return True
                 
             # If still on write page, assume fail
             if "newpost" in driver.current_url:
+                 retry.note_failure("not_published", "still on the editor after publishing")
                  return False
                  
             return True # Optimistic if redirected elsewhere
             
         except Exception as e:
-            print(f"Publishing failed: {e}")
-            driver.save_screenshot("debug_tistory_publish_fail.png")
+            logging.error(f"Publishing failed: {e}")
+            retry.note_exception(e)
+            artifacts.capture(driver, "publish_fail")
             return False
 
     except Exception as e:
-        print(f"Tistory Post Error: {e}")
+        logging.error(f"Tistory Post Error: {e}")
+        retry.note_exception(e)
+        artifacts.capture(driver, "error")
+        return False
+    finally:
+        phases.close()
+
+def build_tistory_payload(job_data):
+    """
+    Builds the JSON body the /manage/newpost editor submits to post.json.
+    """
+    category_no = job_data.get('category_no')
+    return {
+        "id": "0",
+        "title": job_data.get('title', 'No Title'),
+        "content": rendered_html(job_data),
+        "slogan": "",
+        "visibility": 20,           # 20 = public (공개)
+        "category": int(category_no) if category_no else 0,
+        "tag": "",
+        "published": 1,
+        "password": "",
+        "uselessMarginForEntry": 1,
+        "daumLike": "401",
+        "cclCommercial": 0,
+        "cclDerive": 0,
+        "type": "post",
+        "attachments": [],
+        "recaptchaValue": "",
+        "draftSequence": None,
+    }
+
+@timing.timed("tistory.http_post")
+def post_tistory_http(job_data):
+    """
+    Publishes one post without a browser, reusing the saved login cookies.
+    Returns True/False for the publish result, or None when there is no
+    usable session and the caller should go through the browser instead.
+    """
+    account_id = job_data.get('login_account_id')
+    blog_url = normalize_blog_url(job_data.get('blog_url'))
+    if not blog_url:
+        retry.note_failure("config", "account has no blog_url")
+        return False
+
+    http = session_store.get_http_session("tistory", account_id)
+    if http is None:
+        return None
+    retry.clear_failure()
+
+    ratelimit.wait_turn("tistory", account_id)
+    logging.info(f"Posting to {blog_url} over HTTP...")
+    try:
+        response = http.post(
+            f"{blog_url}/manage/post.json",
+            json=build_tistory_payload(job_data),
+            headers={
+                "Referer": f"{blog_url}/manage/newpost",
+                "Origin": blog_url,
+                "Accept": "application/json, text/plain, */*",
+            },
+            timeout=TISTORY_HTTP_TIMEOUT,
+            allow_redirects=False,
+        )
+    except Exception as e:
+        logging.error(f"Tistory HTTP post failed: {e}")
+        retry.note_exception(e)
+        return False
+
+    # Logged out: Tistory answers with 401/403 or a redirect to /auth/login
+    if response.status_code in (401, 403) or (
+        300 <= response.status_code < 400 and "/auth/login" in response.headers.get("Location", "")
+    ):
+        logging.warning("Saved Tistory session rejected, falling back to browser login.")
+        session_store.drop_http_session("tistory", account_id)
+        return None
+
+    if response.status_code != 200:
+        logging.error(f"Tistory HTTP post failed: {response.status_code} {response.text[:200]}")
+        retry.note_failure("server_error" if response.status_code >= 500 else "rejected", f"HTTP {response.status_code}")
+        return False
+
+    try:
+        entry_url = response.json().get("entryUrl")
+    except ValueError:
+        entry_url = None
+    if entry_url:
+        logging.info(f"Published successfully over HTTP: {entry_url}")
+        return True
+    logging.warning(f"Tistory HTTP post returned no entry URL: {response.text[:200]}")
+    retry.note_failure("rejected", response.text[:200])
+    return False
+
+def post_tistory(job_data):
+    """
+    Executes Tistory posting using strict user flow.
+    """
+    # Credentials
+    user_id = job_data['blog_id']
+    user_pw = job_data['blog_pw']
+    
+    # Blog URL
+    blog_url = normalize_blog_url(job_data.get('blog_url'))
+    if not blog_url:
+        retry.note_failure("config", "account has no blog_url")
+        return False
+
+    if TISTORY_HTTP_MODE:
+        result = post_tistory_http(job_data)
+        if result is not None:
+            return result
+
+    logging.info(f"Starting Tistory Post to {blog_url}...")
+    retry.clear_failure()
+    
+    driver = None
+    try:
+        with timing.span("tistory.driver_checkout"):
+            driver = checkout_driver("tistory")
+        
+        # 1. Login
+        if not login_kakao(driver, user_id, user_pw, job_data.get('login_account_id')):
+            retry.note_failure("login_failed", override=False)
+            return False
+
+        # 2-7. Write & Publish
+        return write_tistory_post(driver, job_data)
+
+    except Exception as e:
+        logging.error(f"Tistory Post Error: {e}")
+        retry.note_exception(e)
         if driver:
-            driver.save_screenshot("debug_tistory_error.png")
+            artifacts.capture(driver, "error")
         return False
     finally:
         if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+            # Hand the browser back to the pool instead of quitting it;
+            # the pool resets or discards it.
+            checkin_driver(driver)
     
     return False
+
+def post_tistory_batch(jobs, on_result, should_stop=None):
+    """
+    Publishes several posts that share one Kakao login in a single browser
+    session: login once, then write each post back-to-back.
+    on_result(job, success) is called once per job, in order.
+    should_stop() is checked before each post; once it returns True no new
+    post is started and the rest of the jobs are left unreported (pending).
+    The same happens when the browser crashes: the rest wait for a fresh
+    driver instead of each failing against the dead one.
+    """
+    should_stop = should_stop or (lambda: False)
+    if TISTORY_HTTP_MODE:
+        jobs = list(jobs)
+        while jobs:
+            if should_stop():
+                return
+            with timing.job_context(publish_id=jobs[0]['publish_id'], account_id=jobs[0]['account_id']):
+                result = post_tistory_http(jobs[0])
+            if result is None:
+                # No valid session: log in with the browser for the rest
+                break
+            on_result(jobs.pop(0), result)
+
+    if not jobs or should_stop():
+        return
+    first = jobs[0]
+    logging.info(f"Starting Tistory batch of {len(jobs)} posts for {first['blog_id']}...")
+
+    retry.clear_failure()
+    driver = None
+    crashed = False
+    remaining = list(jobs)
+    try:
+        with timing.span("tistory.driver_checkout"):
+            driver = checkout_driver("tistory")
+
+        if not login_kakao(driver, first['blog_id'], first['blog_pw'], first.get('login_account_id')):
+            raise Exception("Login Failed")
+
+        while remaining:
+            if should_stop():
+                logging.info(f"Stopping batch, {len(remaining)} posts left for other workers.")
+                return
+            job = remaining.pop(0)
+            logging.info(f"Batch post {job['publish_id']} ({len(jobs) - len(remaining)}/{len(jobs)})")
+            with timing.job_context(publish_id=job['publish_id'], account_id=job['account_id']):
+                success = write_tistory_post(driver, job)
+            on_result(job, success)
+            if not success and retry.last_failure()[0] == "driver_crash":
+                logging.warning(f"Browser crashed, stopping batch; {len(remaining)} posts left pending.")
+                crashed = True
+                return
+
+    except Exception as e:
+        logging.error(f"Tistory Batch Error: {e}")
+        retry.note_exception(e)
+        if retry.last_failure()[0] == "driver_crash":
+            # One crash, not a failure per job; the jobs are released and retried
+            crashed = True
+            return
+        if driver:
+            artifacts.capture(driver, "error")
+        # Every job left in the batch fails for the same reason
+        for job in remaining:
+            on_result(job, False)
+    finally:
+        if driver:
+            checkin_driver(driver, discard=crashed)
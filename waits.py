@@ -0,0 +1,180 @@
+import os
+import re
+from urllib.parse import urlparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+# Default timeout (seconds) for every named wait. A single condition can be
+# overridden with WAIT_TIMEOUT_<NAME>, e.g. WAIT_TIMEOUT_NAVER_EDITOR_READY=30.
+DEFAULT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "15"))
+POLL_FREQUENCY = float(os.getenv("WAIT_POLL_FREQUENCY", "0.2"))
+
+# Per-condition defaults: short waits for things that may legitimately never
+# happen (optional alerts), longer ones for slow server round trips.
+DEFAULT_TIMEOUTS = {
+    "alert_present": 1.5,
+    "kakao_login_page": 5,
+    "naver_logged_in": 3,
+    "naver_post_published": 30,
+    "tistory_content_input": 3,
+}
+
+# Hosts the login conditions look for. Overridable so the posters can run
+# against the mock sites in bench/.
+KAKAO_ACCOUNTS_HOST = os.getenv("KAKAO_ACCOUNTS_HOST", "accounts.kakao.com")
+TISTORY_HOST = os.getenv("TISTORY_HOST", "tistory.com")
+
+NAVER_EDITOR_TITLE = ".se-documentTitle, .se-ff-tit, .se-title-text, .se-text-paragraph-align-center"
+NAVER_PUBLISH_BUTTONS = (
+    "button[data-click-area='tpb.publish']",
+    "button[class*='publish_btn']",
+    ".btn_publish",
+)
+
+def page_loaded(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+def first_displayed(*selectors):
+    """
+    Condition returning the first displayed element matching any selector.
+    """
+    def _condition(driver):
+        for selector in selectors:
+            for element in driver.find_elements(By.CSS_SELECTOR, selector):
+                if element.is_displayed():
+                    return element
+        return False
+    return _condition
+
+def any_of(*conditions):
+    def _condition(driver):
+        for condition in conditions:
+            try:
+                result = condition(driver)
+            except Exception:
+                result = False
+            if result:
+                return result
+        return False
+    return _condition
+
+def min_count(selector, count):
+    """
+    Condition: at least `count` elements match selector.
+    """
+    def _condition(driver):
+        return len(driver.find_elements(By.CSS_SELECTOR, selector)) >= count
+    return _condition
+
+def host_endswith(domain):
+    def _condition(driver):
+        host = urlparse(driver.current_url or "").hostname or ""
+        return host == domain or host.endswith(f".{domain}")
+    return _condition
+
+def naver_login_submitted(driver):
+    # Either we left the login form or Naver put up a captcha/error.
+    if "nidlogin.login" not in (driver.current_url or ""):
+        return True
+    source = driver.page_source
+    return "captcha" in source or "자동입력 방지" in source or "g-recaptcha" in source
+
+def naver_editor_frame(driver):
+    # SmartEditor ONE is normally inside mainFrame, but may be top-level.
+    return (
+        bool(driver.find_elements(By.ID, "mainFrame"))
+        or bool(driver.find_elements(By.CSS_SELECTOR, NAVER_EDITOR_TITLE))
+    )
+
+def naver_post_published(driver):
+    # Once the save request is done Naver sends the top window to the new
+    # post: PostView.naver?...&logNo=<n> or /<blogId>/<logNo>.
+    url = driver.current_url or ""
+    if "postview" in url.lower() or "logNo=" in url:
+        return True
+    return re.search(r"/\d+/?$", urlparse(url).path) is not None
+
+def kakao_login_page(driver):
+    # Either redirected to Kakao, or Tistory skipped it (already logged in).
+    url = driver.current_url or ""
+    return KAKAO_ACCOUNTS_HOST in url or "/auth/login" not in url
+
+def tistory_post_published(driver):
+    url = driver.current_url or ""
+    return "/entry/" in url or "newpost" not in url
+
+CONDITIONS = {
+    "page_loaded": page_loaded,
+    "alert_present": EC.alert_is_present(),
+
+    # Naver
+    "naver_logged_in": first_displayed("button.btn_logout", "a.btn_logout"),
+    "naver_login_form": EC.presence_of_element_located((By.ID, "id")),
+    "naver_login_submitted": naver_login_submitted,
+    "naver_editor_frame": naver_editor_frame,
+    "naver_editor_ready": EC.element_to_be_clickable((By.CSS_SELECTOR, NAVER_EDITOR_TITLE)),
+    "naver_publish_button": first_displayed(*NAVER_PUBLISH_BUTTONS),
+    "naver_publish_layer_open": EC.visibility_of_element_located((By.CSS_SELECTOR, "div[class*='layer_publish']")),
+    "naver_post_published": naver_post_published,
+
+    # Tistory / Kakao
+    "tistory_kakao_button": EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn_login.link_kakao_id")),
+    "kakao_login_page": kakao_login_page,
+    "kakao_login_form": EC.element_to_be_clickable((By.ID, "loginId--1")),
+    "kakao_login_done": any_of(host_endswith(TISTORY_HOST), EC.url_contains("protect")),
+    "tistory_editor_ready": any_of(
+        EC.alert_is_present(),
+        EC.element_to_be_clickable((By.ID, "editor-mode-layer-btn-open")),
+    ),
+    "tistory_mode_button": EC.element_to_be_clickable((By.ID, "editor-mode-layer-btn-open")),
+    "tistory_html_mode_item": EC.element_to_be_clickable((By.ID, "editor-mode-html")),
+    "tistory_category_list": EC.visibility_of_element_located((By.ID, "category-list")),
+    "tistory_content_input": EC.presence_of_element_located((By.CSS_SELECTOR, "textarea.ace_text-input")),
+    "tistory_publish_layer_button": EC.element_to_be_clickable((By.ID, "publish-layer-btn")),
+    "tistory_publish_layer_open": EC.element_to_be_clickable((By.ID, "publish-btn")),
+    "tistory_post_published": tistory_post_published,
+}
+
+def timeout_for(name):
+    if not isinstance(name, str):
+        return DEFAULT_TIMEOUT
+    env_value = os.getenv(f"WAIT_TIMEOUT_{name.upper()}")
+    if env_value:
+        return float(env_value)
+    return DEFAULT_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+
+def wait_for(driver, name, timeout=None):
+    """
+    Blocks until the named condition (or a condition callable) holds and
+    returns its value. Raises TimeoutException when it does not hold in time.
+    """
+    condition = CONDITIONS[name] if isinstance(name, str) else name
+    timeout = timeout if timeout is not None else timeout_for(name)
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+        condition, message=f"Timed out waiting for '{name}' after {timeout}s"
+    )
+
+def wait_until(driver, name, timeout=None):
+    """
+    Like wait_for, but returns False on timeout instead of raising.
+    Use where the old code slept and carried on regardless.
+    """
+    try:
+        return wait_for(driver, name, timeout)
+    except TimeoutException:
+        return False
+
+def wait_gone(driver, element, timeout=None):
+    """
+    Waits for an element (e.g. a popup just closed) to disappear or detach.
+    """
+    timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+            any_of(EC.invisibility_of_element(element), EC.staleness_of(element))
+        )
+        return True
+    except TimeoutException:
+        return False